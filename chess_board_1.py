@@ -1,22 +1,27 @@
+import bisect
+import logging
 import chess
 import time
-import csv
-import copy
+import mmap
 import uuid
 import os
+import random
 import io
 
+import numpy as np
 import sentry_sdk
+from contextlib import nullcontext
 from logging_config import get_logger
 from performance_monitoring import (
     track_performance,
     measure_operation,
     track_slow_operations,
 )
+from optional_dependencies import NUMBA_AVAILABLE, njit
 from dotenv import load_dotenv
 from chess import pgn
 
-from pieces import Bishop, King, Knight, Pawn, Queen, Rook
+from pieces import SHARED_PIECES, Bishop, King, Knight, Pawn, Queen, Rook
 
 # Load environment variables
 load_dotenv()
@@ -67,8 +72,481 @@ def configure_sentry():
 # Call Sentry configuration
 configure_sentry()
 
+OPENINGS_PATH = "./openings/all.tsv"
+
+# Per-call Sentry spans on hot paths cost more than the work they measure,
+# set CHESS_TRACE_HOT_PATHS=1 to turn them on when profiling
+_HOT_PATH_TRACE = os.getenv("CHESS_TRACE_HOT_PATHS", "").lower() in ("1", "true")
+
+# nullcontext keeps no state, so one instance serves every untraced call
+_NULL_SPAN = nullcontext()
+
+
+def _hot_span(op, description, *args):
+    """
+    Sentry span for hot-path methods, a no-op unless _HOT_PATH_TRACE is set.
+    description is %-formatted with args only when the span is opened
+    """
+    if _HOT_PATH_TRACE:
+        return sentry_sdk.start_span(
+            op=op, description=description % args if args else description
+        )
+    return _NULL_SPAN
+
+
+def _hot_operation(*args, **kwargs):
+    """measure_operation for hot-path methods, a no-op unless _HOT_PATH_TRACE is set"""
+    if _HOT_PATH_TRACE:
+        return measure_operation(*args, **kwargs)
+    return _NULL_SPAN
+
+
+def _hot_track(**kwargs):
+    """track_performance for hot-path methods, bound when the class is defined"""
+    if _HOT_PATH_TRACE:
+        return track_performance(**kwargs)
+    return lambda func: func
+
+
+# Signed piece code per symbol, positive for white and negative for black
+PIECE_CODES = {"P": 1, "N": 2, "B": 3, "R": 4, "Q": 5, "K": 6}
+PIECE_CODES.update({letter.lower(): -code for letter, code in PIECE_CODES.items()})
+
+# Material weight indexed by abs(piece code)
+CODE_WEIGHTS = np.array([0, 1, 3, 3, 5, 9, 0], dtype=np.int16)
+
+# Piece value plus center control bonus for each square, indexed by
+# piece code + 6 and scored from white's side
+CENTER_BONUS = np.zeros((8, 8), dtype=np.int32)
+CENTER_BONUS[2:6, 2:6] = 15
+CENTER_BONUS[3:5, 3:5] = 30
+PIECE_SQUARE_VALUES = np.zeros((13, 8, 8), dtype=np.int32)
+for _code, _value in enumerate((100, 320, 330, 500, 900, 20000), start=1):
+    PIECE_SQUARE_VALUES[6 + _code] = _value + CENTER_BONUS
+    PIECE_SQUARE_VALUES[6 - _code] = -(_value + CENTER_BONUS)
+_ROWS, _COLS = np.indices((8, 8))
+
+# Cells printed by the debug board displays
+EMPTY_GLYPH = "|  |"
+PIECE_GLYPH = {
+    piece_type: f"|{piece_type.short}|"
+    for piece_type in (Pawn, Knight, Bishop, Rook, Queen, King)
+}
+COLOUR_GLYPH = {"white": "|wh|", "black": "|bl|"}
+COORDINATE_ROWS = [[f"|{x}{y}|" for y in range(8)] for x in range(8)]
+
+# FEN run-length digit for each count of empty squares
+FEN_DIGITS = "012345678"
+
+# Starting piece codes, laid out like self.board
+INITIAL_CODES = np.zeros((8, 8), dtype=np.int8)
+INITIAL_CODES[0] = [4, 2, 3, 6, 5, 3, 2, 4]
+INITIAL_CODES[1] = 1
+INITIAL_CODES[6] = -1
+INITIAL_CODES[7] = -INITIAL_CODES[0]
+
+# Starting bitboards keyed by (colour, piece letter)
+# Bit (x << 3) | y is set when self.board[x][y] holds that piece
+INITIAL_BITBOARDS = {
+    ("white", "P"): 0x000000000000FF00,
+    ("white", "N"): 0x0000000000000042,
+    ("white", "B"): 0x0000000000000024,
+    ("white", "R"): 0x0000000000000081,
+    ("white", "Q"): 0x0000000000000010,
+    ("white", "K"): 0x0000000000000008,
+    ("black", "P"): 0x00FF000000000000,
+    ("black", "N"): 0x4200000000000000,
+    ("black", "B"): 0x2400000000000000,
+    ("black", "R"): 0x8100000000000000,
+    ("black", "Q"): 0x1000000000000000,
+    ("black", "K"): 0x0800000000000000,
+}
+
+# Zobrist keys, one random 64-bit number per (colour, piece letter) and square
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST_KEYS = {
+    key: tuple(_zobrist_rng.getrandbits(64) for _ in range(64))
+    for key in INITIAL_BITBOARDS
+}
+
+
+def zobrist_hash(bitboards):
+    """XOR together the Zobrist keys of every piece in a set of bitboards"""
+    h = 0
+    for key, bits in bitboards.items():
+        keys = ZOBRIST_KEYS[key]
+        while bits:
+            h ^= keys[(bits & -bits).bit_length() - 1]
+            bits &= bits - 1
+    return h
+
+
+INITIAL_ZOBRIST = zobrist_hash(INITIAL_BITBOARDS)
+
+# Squares between king and rook that must be empty to castle
+QUEENSIDE_EMPTY = {"white": 0x06, "black": 0x06 << 56}
+KINGSIDE_EMPTY = {"white": 0x60, "black": 0x60 << 56}
+
+# King and rook starting squares as bitboards
+KING_HOME = {"white": 0x08, "black": 0x08 << 56}
+QUEENSIDE_ROOK = {"white": 0x01, "black": 0x01 << 56}
+KINGSIDE_ROOK = {"white": 0x80, "black": 0x80 << 56}
+
+# King and rook home squares; any change there loses that castling right
+CASTLING_HOMES = {
+    (0, 3): ("white", None),
+    (0, 0): ("white", "q"),
+    (0, 7): ("white", "k"),
+    (7, 3): ("black", None),
+    (7, 0): ("black", "q"),
+    (7, 7): ("black", "k"),
+}
+CASTLING_HOME_MASK = 0x8900000000000089
+# King target column and rook (from, to) columns for each castling side
+CASTLING_MOVES = {"queenside": (2, (0, 3)), "kingside": (6, (7, 5))}
+
+# (dx, dy) steps used when walking out from a square to find its attackers
+ROOK_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+# Each ray family with the piece types that attack along it
+SLIDER_RAYS = (
+    (ROOK_DIRECTIONS, (Rook, Queen)),
+    (BISHOP_DIRECTIONS, (Bishop, Queen)),
+)
+KNIGHT_OFFSETS = (
+    (1, 2),
+    (1, -2),
+    (-1, 2),
+    (-1, -2),
+    (2, 1),
+    (2, -1),
+    (-2, 1),
+    (-2, -1),
+)
+
+# The same steps as arrays for the compiled attack query, rook rays first
+_RAY_DELTAS = np.array(ROOK_DIRECTIONS + BISHOP_DIRECTIONS, dtype=np.int64)
+_KNIGHT_DELTAS = np.array(KNIGHT_OFFSETS, dtype=np.int64)
+
+
+def _step_table(steps):
+    """Bitboard of the squares one step away from each square"""
+    table = []
+    for x in range(8):
+        for y in range(8):
+            mask = 0
+            for dx, dy in steps:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < 8 and 0 <= ny < 8:
+                    mask |= 1 << ((nx << 3) | ny)
+            table.append(mask)
+    return table
+
+
+def _ray_table(dx, dy):
+    """Bitboard of every square on the (dx, dy) ray out of each square"""
+    table = []
+    for x in range(8):
+        for y in range(8):
+            mask = 0
+            nx, ny = x + dx, y + dy
+            while 0 <= nx < 8 and 0 <= ny < 8:
+                mask |= 1 << ((nx << 3) | ny)
+                nx, ny = nx + dx, ny + dy
+            table.append(mask)
+    return table
+
+
+def _passed_pawn_table(direction):
+    """
+    Bitboard of the squares on a pawn's file and the neighbouring files
+    ahead of it, for a pawn moving along direction from each square
+    """
+    table = []
+    for x in range(8):
+        for y in range(8):
+            mask = 0
+            for ahead_x in range(x + direction, 8 if direction > 0 else -1, direction):
+                for ahead_y in (y - 1, y, y + 1):
+                    if 0 <= ahead_y < 8:
+                        mask |= 1 << ((ahead_x << 3) | ahead_y)
+            table.append(mask)
+    return table
+
+
+# Attack tables indexed by square (x << 3) | y
+KNIGHT_ATTACKS = _step_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _step_table(ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+# Squares a pawn of each colour must stand on to attack the square
+PAWN_ATTACKERS = {
+    "white": _step_table(((-1, -1), (-1, 1))),
+    "black": _step_table(((1, -1), (1, 1))),
+}
+# Evaluation bonus per valid move, the king only scores it in the endgame
+MOBILITY_WEIGHTS = {Knight: 10, Bishop: 8, Queen: 5, King: 8}
+
+# Every square on file y, indexed by y
+FILE_MASKS = [0x0101010101010101 << y for y in range(8)]
+# Squares that must hold no pawn for a pawn to be passed
+PASSED_PAWN_MASKS = {"white": _passed_pawn_table(1), "black": _passed_pawn_table(-1)}
+# Rays paired with whether they run towards higher square numbers, which
+# decides if the nearest blocker is the lowest or the highest bit
+ROOK_RAYS = tuple((dx * 8 + dy > 0, _ray_table(dx, dy)) for dx, dy in ROOK_DIRECTIONS)
+BISHOP_RAYS = tuple(
+    (dx * 8 + dy > 0, _ray_table(dx, dy)) for dx, dy in BISHOP_DIRECTIONS
+)
+
+
+def _ray_squares(dx, dy):
+    """The squares along the (dx, dy) ray out of each square, nearest first"""
+    table = []
+    for x in range(8):
+        for y in range(8):
+            squares = []
+            nx, ny = x + dx, y + dy
+            while 0 <= nx < 8 and 0 <= ny < 8:
+                squares.append((nx, ny))
+                nx, ny = nx + dx, ny + dy
+            table.append(tuple(squares))
+    return table
+
+
+# Ray walks for each sliding piece, in the order its get_valid_moves takes
+# them: step between squares, ray bitboards and the squares in walk order
+_ROOK_WALKS = tuple(
+    (dx * 8 + dy, _ray_table(dx, dy), _ray_squares(dx, dy))
+    for dx, dy in ROOK_DIRECTIONS
+)
+_BISHOP_WALKS = tuple(
+    (dx * 8 + dy, _ray_table(dx, dy), _ray_squares(dx, dy))
+    for dx, dy in BISHOP_DIRECTIONS
+)
+PIECE_WALKS = {
+    Rook: _ROOK_WALKS,
+    Bishop: _BISHOP_WALKS,
+    Queen: _ROOK_WALKS + _BISHOP_WALKS,
+}
+
+
+def _ray_targets(square, occupied, own, walks):
+    """
+    Squares a slider on square can move to, nearest first along each ray.
+    Each ray is cut at its first blocker, which is kept unless it is one
+    of own
+    """
+    targets = []
+    for step, masks, squares in walks:
+        blockers = masks[square] & occupied
+        if not blockers:
+            targets += squares[square]
+            continue
+        if step > 0:
+            nearest = (blockers & -blockers).bit_length() - 1
+        else:
+            nearest = blockers.bit_length() - 1
+        # Up to and including the blocker, minus one if it is ours
+        reach = (nearest - square) // step - ((own >> nearest) & 1)
+        targets += squares[square][:reach]
+    return targets
+
+
+@njit(cache=True)
+def _square_attacked_codes(codes, x, y, enemy_sign):
+    """
+    Return True if a piece of enemy_sign (1 white, -1 black) attacks (x, y)
+    on a PIECE_CODES grid. Mirrors ChessBoard._square_attacked_by
+    """
+    for i in range(8):
+        dx = _RAY_DELTAS[i, 0]
+        dy = _RAY_DELTAS[i, 1]
+        slider = 4 if i < 4 else 3  # rook rays then bishop rays
+        nx = x + dx
+        ny = y + dy
+        adjacent = True
+        while 0 <= nx < 8 and 0 <= ny < 8:
+            code = codes[nx, ny] * enemy_sign
+            if code != 0:
+                if code == slider or code == 5 or (adjacent and code == 6):
+                    return True
+                break
+            nx += dx
+            ny += dy
+            adjacent = False
+
+    for i in range(8):
+        nx = x + _KNIGHT_DELTAS[i, 0]
+        ny = y + _KNIGHT_DELTAS[i, 1]
+        if 0 <= nx < 8 and 0 <= ny < 8 and codes[nx, ny] * enemy_sign == 2:
+            return True
+
+    # White pawns capture towards higher x, so they sit one rank below
+    pawn_x = x - enemy_sign
+    if 0 <= pawn_x < 8:
+        if y > 0 and codes[pawn_x, y - 1] * enemy_sign == 1:
+            return True
+        if y < 7 and codes[pawn_x, y + 1] * enemy_sign == 1:
+            return True
+    return False
+
+
+@njit(cache=True)
+def _pseudo_legal_codes(codes, sign, double_step):
+    """
+    Return the moves of every sign (1 white, -1 black) piece on a PIECE_CODES
+    grid as rows of (x, y, endx, endy), ignoring checks. double_step marks the
+    pawns still allowed two squares. Squares and directions are visited in
+    the same order as the pieces' get_valid_moves
+    """
+    moves = np.empty((512, 4), dtype=np.int8)
+    count = 0
+    for x in range(8):
+        for y in range(8):
+            own = codes[x, y] * sign
+            if own <= 0:
+                continue
+            if own == 1:
+                nx = x + sign
+                if 0 <= nx < 8:
+                    if codes[nx, y] == 0:
+                        moves[count, 0] = x
+                        moves[count, 1] = y
+                        moves[count, 2] = nx
+                        moves[count, 3] = y
+                        count += 1
+                        far = nx + sign
+                        if double_step[x, y] and 0 <= far < 8 and codes[far, y] == 0:
+                            moves[count, 0] = x
+                            moves[count, 1] = y
+                            moves[count, 2] = far
+                            moves[count, 3] = y
+                            count += 1
+                    for ny in (y - 1, y + 1):
+                        if 0 <= ny < 8 and codes[nx, ny] * sign < 0:
+                            moves[count, 0] = x
+                            moves[count, 1] = y
+                            moves[count, 2] = nx
+                            moves[count, 3] = ny
+                            count += 1
+            elif own == 2:
+                for i in range(8):
+                    nx = x + _KNIGHT_DELTAS[i, 0]
+                    ny = y + _KNIGHT_DELTAS[i, 1]
+                    if 0 <= nx < 8 and 0 <= ny < 8 and codes[nx, ny] * sign <= 0:
+                        moves[count, 0] = x
+                        moves[count, 1] = y
+                        moves[count, 2] = nx
+                        moves[count, 3] = ny
+                        count += 1
+            else:
+                # Rooks take the rook rays, bishops the bishop rays, queens
+                # and kings both, kings one step only
+                first = 4 if own == 3 else 0
+                last = 4 if own == 4 else 8
+                for i in range(first, last):
+                    dx = _RAY_DELTAS[i, 0]
+                    dy = _RAY_DELTAS[i, 1]
+                    nx = x + dx
+                    ny = y + dy
+                    while 0 <= nx < 8 and 0 <= ny < 8:
+                        target = codes[nx, ny] * sign
+                        if target > 0:
+                            break
+                        moves[count, 0] = x
+                        moves[count, 1] = y
+                        moves[count, 2] = nx
+                        moves[count, 3] = ny
+                        count += 1
+                        if target < 0 or own == 6:
+                            break
+                        nx += dx
+                        ny += dy
+    return moves[:count]
+
+
+@njit(cache=True)
+def _evaluate_codes(codes, sign, endgame):
+    """
+    Score a PIECE_CODES grid for the side with sign (1 white, -1 black),
+    leaving out mobility. Mirrors the Python path of
+    ChessBoard.evaluate_position
+    """
+    material = 0
+    score = 0
+    for x in range(8):
+        for y in range(8):
+            code = codes[x, y]
+            if code == 0:
+                continue
+            material += PIECE_SQUARE_VALUES[code + 6, x, y]
+            own = code * sign
+            if own == 1:
+                # Advancement, and a passed pawn has no pawn on its own or the
+                # next files anywhere ahead of it
+                score += 10 * (x - 1) if sign == 1 else 10 * (6 - x)
+                passed = True
+                ahead_x = x + sign
+                while passed and 0 <= ahead_x < 8:
+                    for ahead_y in range(max(y - 1, 0), min(y + 2, 8)):
+                        if abs(codes[ahead_x, ahead_y]) == 1:
+                            passed = False
+                    ahead_x += sign
+                if passed:
+                    score += 50
+            elif own == 2:
+                # Outpost, guarded by one of our pawns
+                if (
+                    y > 0
+                    and (x > 3 if sign == 1 else x < 4)
+                    and codes[x - sign, y - 1] == sign
+                ):
+                    score += 30
+            elif own == 4:
+                open_file = True
+                for check_x in range(8):
+                    if abs(codes[check_x, y]) == 1:
+                        open_file = False
+                if open_file:
+                    score += 30
+            elif own == 6 and not endgame:
+                if (x < 2) if sign == 1 else (x > 5):
+                    score += 60
+    return material * sign + score
+
+
+def _load_openings(file_path):
+    try:
+        with sentry_sdk.start_span(
+            op="chess.load_openings", description="Loading chess openings"
+        ) as _:
+            logger.info(f"Loading openings from {file_path}")
+            # Keys and names are kept as utf-8 bytes, names are decoded on lookup
+            openings = {}
+            logger.info(f"path: {file_path}")
+            with open(file_path, "rb") as tsvfile, mmap.mmap(
+                tsvfile.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                for line in data.read().splitlines():
+                    row = line.split(b"\t", 3)
+                    if len(row) >= 3:
+                        openings[row[2]] = row[1]
+            return openings
+    except Exception as e:
+        logger.error(f"Error loading openings: {e}")
+        sentry_sdk.capture_exception(e)
+        return {}
+
 
 class ChessBoard:
+    # Parsed once per process and shared by every board
+    openings = _load_openings(OPENINGS_PATH)
+    # Sorted move strings for longest-prefix lookups in get_opening
+    _opening_keys = sorted(openings)
+    # Plies in the longest opening line, moves past it are not recorded
+    _book_plies = max(
+        (sum(not token.endswith(b".") for token in key.split()) for key in openings),
+        default=0,
+    )
+
     def __init__(self):
         try:
             with measure_operation("init_chess_board", "initialization"):
@@ -90,13 +568,55 @@ class ChessBoard:
 
                 self.board = [[None for _ in range(8)] for _ in range(8)]
 
-                # Initialize board_cache with the correct size
-                self.board_cache = ["|  |" for _ in range(64)]
-
                 # Initialize pieces with performance tracking
                 self._initialize_pieces()
 
-                self.openings = self.load_openings("./openings/all.tsv")
+                # One bitboard per piece type and colour plus an occupancy mask
+                self.bb = dict(INITIAL_BITBOARDS)
+                self.occupied = 0xFFFF00000000FFFF
+                # Zobrist hash of the piece placement, updated by _set_square
+                self.zobrist = INITIAL_ZOBRIST
+
+                # Castling rights, cleared by _set_square when a home square changes
+                self.king_moved = {"white": False, "black": False}
+                self.rook_moved = {
+                    "white": {"q": False, "k": False},
+                    "black": {"q": False, "k": False},
+                }
+
+                # Signed piece code per square, updated by _set_square
+                self._codes = INITIAL_CODES.copy()
+
+                # Material per colour, updated by _set_square
+                self._material = {"white": 39, "black": 39}
+
+                # Occupied squares per colour, updated by _set_square
+                self._pieces_by_colour = {
+                    "white": {(x, y) for x in (0, 1) for y in range(8)},
+                    "black": {(x, y) for x in (6, 7) for y in range(8)},
+                }
+
+                # python-chess mirror of the board, updated as moves are made
+                self._shadow = self._build_shadow()
+                # The game on a standard python-chess board and its SAN moves,
+                # followed while it can still be in the opening book
+                self._book_board = chess.Board()
+                self._book_moves = []
+
+                # (move_count, player_turn) and the FEN built for it
+                self._fen_cache = None
+
+                # Reused by evaluate_move so trial positions don't allocate a board
+                self._scratch_board = [[None] * 8 for _ in range(8)]
+                self._scratch_codes = np.zeros((8, 8), dtype=np.int8)
+
+                # (move_count, PGN text) from the last board_array_to_pgn
+                self._pgn_cache = None
+
+                # get_opening result and the move count it was looked up at
+                self._last_opening_movecount = None
+                self._last_opening_result = None
+
                 logger.info("ChessBoard initialized")
         except Exception as e:
             logger.error(f"Error initializing chess board: {e}")
@@ -108,60 +628,193 @@ class ChessBoard:
         """Initialize chess pieces with performance tracking"""
         # Create white pieces
         self.board[0][0] = Rook("white")
-        self.board[0][1] = Knight("white")
-        self.board[0][2] = Bishop("white")
+        self.board[0][1] = SHARED_PIECES[Knight, "white"]
+        self.board[0][2] = SHARED_PIECES[Bishop, "white"]
         self.board[0][3] = King("white")  # King should be on e1 (0,3)
-        self.board[0][4] = Queen("white")  # Queen should be on d1 (0,4)
-        self.board[0][5] = Bishop("white")
-        self.board[0][6] = Knight("white")
+        self.board[0][4] = SHARED_PIECES[Queen, "white"]  # Queen should be on d1 (0,4)
+        self.board[0][5] = SHARED_PIECES[Bishop, "white"]
+        self.board[0][6] = SHARED_PIECES[Knight, "white"]
         self.board[0][7] = Rook("white")
         for i in range(8):
             self.board[1][i] = Pawn("white")
 
         # Create black pieces
         self.board[7][0] = Rook("black")
-        self.board[7][1] = Knight("black")
-        self.board[7][2] = Bishop("black")
+        self.board[7][1] = SHARED_PIECES[Knight, "black"]
+        self.board[7][2] = SHARED_PIECES[Bishop, "black"]
         self.board[7][3] = King("black")  # King should be on e8 (7,3)
-        self.board[7][4] = Queen("black")  # Queen should be on d8 (7,4)
-        self.board[7][5] = Bishop("black")
-        self.board[7][6] = Knight("black")
+        self.board[7][4] = SHARED_PIECES[Queen, "black"]  # Queen should be on d8 (7,4)
+        self.board[7][5] = SHARED_PIECES[Bishop, "black"]
+        self.board[7][6] = SHARED_PIECES[Knight, "black"]
         self.board[7][7] = Rook("black")
         for i in range(8):
             self.board[6][i] = Pawn("black")
 
+    def _set_square(self, x, y, piece):
+        """Place a piece (or None) on a square, keeping the bitboards in sync"""
+        self._fen_cache = None
+        bit = 1 << ((x << 3) | y)
+        if bit & CASTLING_HOME_MASK:
+            colour, side = CASTLING_HOMES[x, y]
+            if side is None:
+                self.king_moved[colour] = True
+            else:
+                self.rook_moved[colour][side] = True
+        old = self.board[x][y]
+        if old is not None:
+            self.bb[old.colour, old.symbol.upper()] &= ~bit
+            self.zobrist ^= ZOBRIST_KEYS[old.colour, old.symbol.upper()][x << 3 | y]
+            self.occupied &= ~bit
+            self._material[old.colour] -= old.weight
+            self._pieces_by_colour[old.colour].discard((x, y))
+        if piece is not None:
+            self.bb[piece.colour, piece.symbol.upper()] |= bit
+            self.zobrist ^= ZOBRIST_KEYS[piece.colour, piece.symbol.upper()][x << 3 | y]
+            self.occupied |= bit
+            self._material[piece.colour] += piece.weight
+            self._pieces_by_colour[piece.colour].add((x, y))
+            self._codes[x, y] = PIECE_CODES[piece.symbol]
+        else:
+            self._codes[x, y] = 0
+        self.board[x][y] = piece
+
+    def _rebuild_state(self):
+        """
+        Recompute the bitboards after self.board has been replaced or edited
+        directly. Castling rights whose king or rook is off its home square
+        are cleared. Rights are never granted back, reset king_moved and
+        rook_moved first when setting up a fresh position
+        """
+        self._fen_cache = None
+        self._last_opening_movecount = None
+        self._pgn_cache = None
+        self.bb = dict.fromkeys(INITIAL_BITBOARDS, 0)
+        self.occupied = 0
+        self._pieces_by_colour = {"white": set(), "black": set()}
+        self._codes = np.zeros((8, 8), dtype=np.int8)
+        for x, row in enumerate(self.board):
+            for y, piece in enumerate(row):
+                if piece is not None:
+                    bit = 1 << ((x << 3) | y)
+                    self.bb[piece.colour, piece.symbol.upper()] |= bit
+                    self.occupied |= bit
+                    self._pieces_by_colour[piece.colour].add((x, y))
+                    self._codes[x, y] = PIECE_CODES[piece.symbol]
+        self.zobrist = zobrist_hash(self.bb)
+        weights = CODE_WEIGHTS[np.abs(self._codes)]
+        self._material = {
+            "white": int(weights[self._codes > 0].sum()),
+            "black": int(weights[self._codes < 0].sum()),
+        }
+        for (x, y), (colour, side) in CASTLING_HOMES.items():
+            piece = self.board[x][y]
+            home_type = King if side is None else Rook
+            if type(piece) is not home_type or piece.colour != colour:
+                if side is None:
+                    self.king_moved[colour] = True
+                else:
+                    self.rook_moved[colour][side] = True
+        self._shadow = self._build_shadow()
+        # The moves that led here are unknown, stop following the book
+        self._book_board = None
+        self._book_moves = []
+
+    def _build_shadow(self):
+        """Build a python-chess board matching self.board"""
+        return chess.Board(self._board_to_fen_fast())
+
+    def _board_to_fen_fast(self):
+        """Build a FEN string straight from self.board, rank x=0 first"""
+        ranks = []
+        for row in self.board:
+            # Empty ranks are common and need no walk
+            if row.count(None) == 8:
+                ranks.append("8")
+                continue
+            parts = []
+            empty = 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    parts.append(FEN_DIGITS[empty])
+                    empty = 0
+                parts.append(piece.symbol)
+            if empty:
+                parts.append(FEN_DIGITS[empty])
+            ranks.append("".join(parts))
+        turn = "w" if self.player_turn == "white" else "b"
+        return f"{'/'.join(ranks)} {turn} - - 0 {self.move_count // 2 + 1}"
+
+    def _push_shadow_move(self, x, y, endx, endy):
+        """Mirror a committed move onto the shadow board"""
+        from_square = chess.square(y, 7 - x)
+        if self._shadow.piece_at(from_square) is None:
+            # self.board was edited directly, resync from scratch
+            self._shadow = self._build_shadow()
+            return
+        self._shadow.push(chess.Move(from_square, chess.square(endy, 7 - endx)))
+
+    def _push_book_move(self, x, y, endx, endy):
+        """
+        Record a committed move in SAN while the game can still be in the
+        opening book. Files run h to a along y, so (0, 3) is e1
+        """
+        book = self._book_board
+        if book is None:
+            return
+        move = chess.Move(chess.square(7 - y, x), chess.square(7 - endy, endx))
+        if len(self._book_moves) >= self._book_plies or not book.is_legal(move):
+            self._book_board = None
+            return
+        san = book.san(move)
+        book.push(move)
+        # A board edited directly no longer follows the recorded moves
+        if chess.flip_horizontal(book.occupied) != self.occupied:
+            self._book_board = None
+            return
+        self._book_moves.append(san)
+
+    def _book_line(self):
+        """The recorded moves as numbered SAN, e.g. 1. e4 e5 2. Nf3"""
+        parts = []
+        for ply, san in enumerate(self._book_moves):
+            parts.append(f"{ply // 2 + 1}. {san}" if ply % 2 == 0 else san)
+        return " ".join(parts)
+
     def load_openings(self, file_path):
-        try:
-            with sentry_sdk.start_span(
-                op="chess.load_openings", description="Loading chess openings"
-            ) as _:
-                logger.info(f"Loading openings from {file_path}")
-                openings = {}
-                logger.info(f"path: {file_path}")
-                with open(file_path, newline="", encoding="utf-8") as tsvfile:
-                    reader = csv.reader(tsvfile, delimiter="\t")
-                    for row in reader:
-                        if len(row) >= 3:
-                            name = row[1]
-                            moves = row[2]
-                            openings[moves] = name
-                return openings
-        except Exception as e:
-            logger.error(f"Error loading openings: {e}")
-            sentry_sdk.capture_exception(e)
-            return {}
+        return _load_openings(file_path)
 
     def get_opening(self):
+        if self._last_opening_movecount == self.move_count:
+            return self._last_opening_result
+        opening = self._find_opening()
+        self._last_opening_movecount = self.move_count
+        self._last_opening_result = opening
+        return opening
+
+    def _find_opening(self):
         try:
-            with sentry_sdk.start_span(
-                op="chess.get_opening", description="Get current opening"
-            ) as _:
-                current_moves = " ".join(self.get_epd())
-                for moves, name in self.openings.items():
-                    if current_moves.startswith(moves):
-                        opening = name
+            with _hot_span(op="chess.get_opening", description="Get current opening"):
+                current_moves = self._book_line().encode()
+                if not current_moves:
+                    return "Unknown Opening"
+                keys = self._opening_keys
+                probe = current_moves
+                index = bisect.bisect_right(keys, probe)
+                while index:
+                    moves = keys[index - 1]
+                    # Only match whole moves, so "5. O-O" does not match "5. O-O-O"
+                    if current_moves.startswith(moves) and current_moves[
+                        len(moves) : len(moves) + 1
+                    ] in (b"", b" "):
+                        opening = self.openings[moves].decode()
                         logger.debug(f"Current opening: {opening}")
                         return opening
+                    # Any shorter match must also prefix what the two share
+                    probe = os.path.commonprefix([probe, moves])
+                    index = bisect.bisect_right(keys, probe, 0, index - 1)
                 return "Unknown Opening"
         except Exception as e:
             logger.error(f"Error getting opening: {e}")
@@ -175,12 +828,10 @@ class ChessBoard:
 
     def get_epd(self):
         try:
-            with sentry_sdk.start_span(
-                op="chess.get_epd", description="Get EPD notation"
-            ) as _:
-                board = chess.Board(self.board_array_to_fen())
-                epd = board.epd()
-                logger.debug(f"EPD: {epd}")
+            with _hot_span(op="chess.get_epd", description="Get EPD notation"):
+                epd = self._shadow.epd()
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"EPD: {epd}")
                 return epd
         except Exception as e:
             logger.error(f"Error getting EPD: {e}")
@@ -194,12 +845,12 @@ class ChessBoard:
 
     def get_all_valid_moves(self):
         try:
-            with sentry_sdk.start_span(
+            with _hot_span(
                 op="chess.get_valid_moves", description="Get all valid moves"
-            ) as _:
-                board = chess.Board(self.board_array_to_fen())
-                valid_moves = [move.uci() for move in board.legal_moves]
-                logger.debug(f"All valid moves: {valid_moves}")
+            ):
+                valid_moves = [move.uci() for move in self._shadow.legal_moves]
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"All valid moves: {valid_moves}")
                 return valid_moves
         except Exception as e:
             logger.error(f"Error getting valid moves: {e}")
@@ -213,43 +864,39 @@ class ChessBoard:
 
     def board_array_to_fen(self):
         try:
-            with sentry_sdk.start_span(
-                op="chess.board_to_fen", description="Convert board to FEN"
-            ) as _:
-                board = chess.Board()
-                board.clear_board()
-                for rank in range(8):
-                    for file in range(8):
-                        piece = self.board[rank][file]
-                        if piece is not None:
-                            board.set_piece_at(
-                                chess.square(file, 7 - rank),
-                                chess.Piece.from_symbol(piece.symbol),
-                            )
-                return board.fen()
+            with _hot_span(op="chess.board_to_fen", description="Convert board to FEN"):
+                key = (self.move_count, self.player_turn)
+                if self._fen_cache is None or self._fen_cache[0] != key:
+                    self._fen_cache = (key, self._board_to_fen_fast())
+                return self._fen_cache[1]
         except Exception as e:
             logger.error(f"Error converting board to FEN: {e}")
             sentry_sdk.capture_exception(e)
             return ""
 
     """
-    Takes no arguments
-    Returns the name of a PGN file containing the current board
+    Takes whether to save the game to a file
+    Returns the PGN text, or the name of the PGN file when save is True
     """
 
-    def board_array_to_pgn(self):
+    def board_array_to_pgn(self, save=False):
         try:
             with sentry_sdk.start_span(
                 op="chess.board_to_pgn", description="Convert board to PGN"
             ) as _:
-                board = chess.Board(self.board_array_to_fen())
-                file_io = io.StringIO()
-                exporter = pgn.FileExporter(file_io)
-                game = pgn.Game.from_board(board)
-                game.accept(exporter)
-                pgn_string = pgn.getvalue(self.board_array_to_fen)
-
-                file_name = f"game_{int(time.time())}.pgn"
+                if self._pgn_cache is None or self._pgn_cache[0] != self.move_count:
+                    file_io = io.StringIO()
+                    exporter = pgn.FileExporter(file_io)
+                    # The shadow board keeps the moves pushed since it was last built
+                    game = pgn.Game.from_board(self._shadow)
+                    game.accept(exporter)
+                    self._pgn_cache = (self.move_count, file_io.getvalue())
+                pgn_string = self._pgn_cache[1]
+
+                if not save:
+                    return pgn_string
+
+                file_name = f"game_{self.game_id}_{uuid.uuid4().hex[:8]}.pgn"
                 with open(file_name, "w") as pgn_file:
                     pgn_file.write(pgn_string)
 
@@ -268,18 +915,11 @@ class ChessBoard:
 
     def get_material_count(self, colour):
         try:
-            with sentry_sdk.start_span(
-                op="chess.get_material", description=f"Get material count for {colour}"
-            ) as _:
-                material = 0
-                for x in range(8):
-                    for y in range(8):
-                        if self.board[x][y] is not None:
-                            if self.board[x][y].colour == colour:
-                                material += self.board[x][y].weight
-                            else:
-                                material -= self.board[x][y].weight
-                logger.debug(f"Material count for {colour}: {material}")
+            with _hot_span("chess.get_material", "Get material count for %s", colour):
+                opponent = "black" if colour == "white" else "white"
+                material = self._material[colour] - self._material[opponent]
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Material count for {colour}: {material}")
                 return material
         except Exception as e:
             logger.error(f"Error calculating material count: {e}")
@@ -294,18 +934,15 @@ class ChessBoard:
     """
 
     def display_board_as_text(self):
-        self.board_cache = []
-        for x in range(0, 8):
-            for y in range(0, 8):
-                if self.board[x][y] is None:
-                    self.board_cache.append("|  |")
-                else:
-                    self.board_cache.append(
-                        "|" + self.board[x][y].__class__.__name__[0:2] + "|"
-                    )
-
-        for i in range(0, 8):
-            logger.debug(self.board_cache[i * 8 : i * 8 + 8])
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        for row in self.board:
+            logger.debug(
+                [
+                    EMPTY_GLYPH if piece is None else PIECE_GLYPH[type(piece)]
+                    for piece in row
+                ]
+            )
         logger.debug("Board displayed as text")
 
     """
@@ -316,16 +953,15 @@ class ChessBoard:
     """
 
     def display_board_as_colours(self):
-        colours = []
-        for x in range(0, 8):
-            for y in range(0, 8):
-                if self.board[x][y] is None:
-                    colours.append("|  |")
-                else:
-                    colours.append("|" + self.board[x][y].colour[0:2] + "|")
-
-        for i in range(0, 8):
-            logger.debug(colours[i * 8 : i * 8 + 8])
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        for row in self.board:
+            logger.debug(
+                [
+                    EMPTY_GLYPH if piece is None else COLOUR_GLYPH[piece.colour]
+                    for piece in row
+                ]
+            )
         logger.debug("Board displayed as colours")
 
     """
@@ -336,50 +972,48 @@ class ChessBoard:
     """
 
     def display_board_as_coordinates(self):
-        coordinates = []
-        for x in range(0, 8):
-            for y in range(0, 8):
-                coordinates.append(f"|{x}{y}|")
-
-        for i in range(0, 8):
-            logger.debug(coordinates[i * 8 : i * 8 + 8])
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        for row in COORDINATE_ROWS:
+            logger.debug(row)
         logger.debug("Board displayed as coordinates")
 
     """
     take a x and y for starting take an x any y for end pos
-    updates the board & board_cache
+    updates the board
     updates the material & move_count if the move is valid
     ends early and reutrns false if the move causes check, there is no pice at the start or the end pos is not in the valid moves
     returns True if move is valid
     """
 
-    @track_performance(op="en_passant", name="check_en_passant")
+    @_hot_track(op="en_passant", name="check_en_passant")
     def enpesaunt(self, x, y, colour):
+        board = self.board
         try:
-            if isinstance(self.board[x][y], Pawn):
+            if isinstance(board[x][y], Pawn):
                 direction = 1 if colour == "white" else -1
                 if (
-                    isinstance(self.board[x][y + 1], Pawn)
-                    and self.board[x][y + 1].colour != colour
-                    and self.board[x][y + 1].first_move
-                    and self.board[x + direction][y + 1] is None
+                    isinstance(board[x][y + 1], Pawn)
+                    and board[x][y + 1].colour != colour
+                    and board[x][y + 1].first_move
+                    and board[x + direction][y + 1] is None
                 ):
-                    logger.debug(f"pawn on ({x}, {y + 1})")
+                    logger.debug("pawn on (%s, %s)", x, y + 1)
                     result = True
                     logger.debug(
-                        f"En passant check at ({x}, {y}) for {colour}: {result}"
+                        "En passant check at (%s, %s) for %s: %s", x, y, colour, result
                     )
                     return result
                 elif (
-                    isinstance(self.board[x][y - 1], Pawn)
-                    and self.board[x][y - 1].colour != colour
-                    and self.board[x][y - 1].first_move
-                    and self.board[x + direction][y - 1] is None
+                    isinstance(board[x][y - 1], Pawn)
+                    and board[x][y - 1].colour != colour
+                    and board[x][y - 1].first_move
+                    and board[x + direction][y - 1] is None
                 ):
-                    logger.debug(f"pawn on ({x}, {y - 1})")
+                    logger.debug("pawn on (%s, %s)", x, y - 1)
                     result = True
                     logger.debug(
-                        f"En passant check at ({x}, {y}) for {colour}: {result}"
+                        "En passant check at (%s, %s) for %s: %s", x, y, colour, result
                     )
                     return result
         except IndexError:
@@ -393,32 +1027,36 @@ class ChessBoard:
     returns "kingside" or "queenside"
     """
 
-    @track_performance(op="castling", name="check_castling")
+    @_hot_track(op="castling", name="check_castling")
     def castling(self, board, player_colour):
-        """Check if castling is possible for the given player"""
+        """
+        Check if castling is possible for the given player.
+        Reads the castling flags and occupancy bitboard, board is unused
+        """
         try:
-            # Get king position based on color
-            king_row = 0 if player_colour == "white" else 7
-            king_col = 3  # King's initial column
-
-            # Check if king exists and hasn't moved
-            king = board[king_row][king_col]
-            if not isinstance(king, King) or not king.first_move:
+            if (
+                self.king_moved[player_colour]
+                or not self.bb[player_colour, "K"] & KING_HOME[player_colour]
+            ):
                 return False
 
-            # Check queenside castling
-            rook_queenside = board[king_row][0]
-            if isinstance(rook_queenside, Rook) and rook_queenside.first_move:
-                # Check if path is clear
-                if all(board[king_row][col] is None for col in [1, 2]):
-                    return "queenside"
+            rooks = self.bb[player_colour, "R"]
+
+            # Check queenside castling with a clear path
+            if (
+                not self.rook_moved[player_colour]["q"]
+                and rooks & QUEENSIDE_ROOK[player_colour]
+                and not self.occupied & QUEENSIDE_EMPTY[player_colour]
+            ):
+                return "queenside"
 
-            # Check kingside castling
-            rook_kingside = board[king_row][7]
-            if isinstance(rook_kingside, Rook) and rook_kingside.first_move:
-                # Check if path is clear
-                if all(board[king_row][col] is None for col in [5, 6]):
-                    return "kingside"
+            # Check kingside castling with a clear path
+            if (
+                not self.rook_moved[player_colour]["k"]
+                and rooks & KINGSIDE_ROOK[player_colour]
+                and not self.occupied & KINGSIDE_EMPTY[player_colour]
+            ):
+                return "kingside"
 
         except Exception as e:
             logger.error(f"Error in castling: {e}")
@@ -431,197 +1069,109 @@ class ChessBoard:
     Returns False for an illegal move
     """
 
-    @track_performance(op="move", name="move_piece")
+    @_hot_track(op="move", name="move_piece")
     def move_piece(self, x, y, endx, endy):
+        board = self.board
         try:
-            with measure_operation(
+            with _hot_operation(
                 "validate_move",
                 "move_validation",
                 tags={"start_pos": f"{x},{y}", "end_pos": f"{endx},{endy}"},
             ):
                 # Update Sentry context with move information
-                sentry_sdk.set_context(
-                    "move",
-                    {
-                        "game_id": self.game_id,
-                        "move_count": self.move_count,
-                        "player_turn": self.player_turn,
-                        "from_pos": f"{x},{y}",
-                        "to_pos": f"{endx},{endy}",
-                    },
-                )
+                if _HOT_PATH_TRACE:
+                    sentry_sdk.set_context(
+                        "move",
+                        {
+                            "game_id": self.game_id,
+                            "move_count": self.move_count,
+                            "player_turn": self.player_turn,
+                            "from_pos": f"{x},{y}",
+                            "to_pos": f"{endx},{endy}",
+                        },
+                    )
 
                 # where there is no piece return False
-                if self.board[x][y] is None:
+                if board[x][y] is None:
                     logger.warning("No piece at this position")
                     return False
 
                 # check if it's the correct turn
-                if self.board[x][y].colour != self.player_turn:
+                if board[x][y].colour != self.player_turn:
                     logger.warning(f"It's {self.player_turn}'s turn")
                     return False
 
                 # enpesaunt rules
-                is_enpesaunt = self.enpesaunt(x, y, self.board[x][y].colour)
-
-                # castling rules
-                is_castling = self.castling(self.board, self.board[x][y].colour)
+                is_enpesaunt = self.enpesaunt(x, y, board[x][y].colour)
+
+                # castling rules, only the king's move along its home rank to
+                # the target square of the available side castles
+                rook_move = None
+                side = self.castling(board, board[x][y].colour)
+                if side and isinstance(board[x][y], King):
+                    home = 0 if board[x][y].colour == "white" else 7
+                    king_to, (rook_from, rook_to) = CASTLING_MOVES[side]
+                    if (
+                        x == endx == home
+                        and endy == king_to
+                        and isinstance(board[home][rook_from], Rook)
+                    ):
+                        rook_move = (rook_from, rook_to)
+                is_castling = rook_move is not None
 
                 # if the end pos is not in the valid moves return False
-                valid_moves = self.board[x][y].get_valid_moves(self.board, x, y)
+                valid_moves = board[x][y].get_valid_moves(board, x, y)
                 if (
                     ((endx, endy) not in valid_moves)
                     and not is_enpesaunt
-                    and not is_castling  # returns False if no castling opportunity
+                    and not is_castling
                 ):
                     logger.warning("Invalid move, not legal")
                     return False
 
-                # Make a temporary move to check if it would put us in check
-                temp_board = [[None for _ in range(8)] for _ in range(8)]
-                # Copy all pieces to temp board
-                for i in range(8):
-                    for j in range(8):
-                        piece = self.board[i][j]
-                        if piece:
-                            # Create a new piece of the same type and color
-                            piece_type = type(piece)
-                            new_piece = piece_type(piece.colour)
-                            # Copy all attributes from the original piece
-                            for attr in dir(piece):
-                                if not attr.startswith("__") and not callable(
-                                    getattr(piece, attr)
-                                ):
-                                    setattr(new_piece, attr, getattr(piece, attr))
-                            temp_board[i][j] = new_piece
-
-                # Store the captured piece if any
-                captured_piece = temp_board[endx][endy]
-
-                # Make the move on the temporary board
-                temp_board[endx][endy] = temp_board[x][y]
-                temp_board[x][y] = None
-
-                # Check if this move would leave us in check
-                check_status = self.check_position(temp_board, self.player_turn)
-                if check_status > 0:  # Either in check (1) or checkmate (2)
-                    logger.warning(
-                        f"Invalid move - would leave us in check (status: {check_status})"
-                    )
+                # Make the move in place to see if it would leave us in check
+                if not self.leaves_king_safe(x, y, endx, endy):
+                    logger.warning("Invalid move - would leave us in check")
                     return False
 
+                # en passant, castling and promotion resync the shadow board
+                special_move = False
+
                 # remove enpesaunt pawn
                 if is_enpesaunt:
-                    if isinstance(self.board[x][y], Pawn) and abs(x - endx) == 2:
-                        if isinstance(self.board[endx][endy + 1], Pawn):
-                            self.board[endx][endy + 1] = None
-                        elif isinstance(self.board[endx][endy - 1], Pawn):
-                            self.board[endx][endy - 1] = None
-
-                # handle castling
-                if is_castling and (
-                    isinstance(self.board[x][y], Rook)
-                    or isinstance(self.board[x][y], King)
-                ):
-                    if endy == 2:  # queenside castling
-                        self.board[endx][endy] = self.board[x][y]
-                        self.board[x][y] = None
-                        self.board[endx][3] = self.board[endx][0]
-                        self.board[endx][0] = None
-                    elif endy == 6:  # kingside castling
-                        self.board[endx][endy] = self.board[x][y]
-                        self.board[x][y] = None
-                        self.board[endx][5] = self.board[endx][7]
-                        self.board[endx][7] = None
-
-                # handle pawn promotion
-                if isinstance(self.board[x][y], Pawn):
-                    match endx:
-                        case 7:
-                            self.promote_pawn(endx, endy, piece=Queen)
-                        case 0:
-                            self.promote_pawn(endx, endy, piece=Queen)
-
-                # update the material
-                if captured_piece is not None:
-                    self.material += captured_piece.weight
-
-                # increment the move count
-                self.move_count += 1
-
-                # Track the actual move operation
-                with measure_operation(
-                    "execute_move",
-                    "move_execution",
-                    tags={
-                        "piece_type": self.board[x][y].__class__.__name__,
-                        "player": self.player_turn,
-                    },
-                ):
-                    piece = self.board[x][y]
-                    logger.info(
-                        f"Moving piece: {piece.__class__.__name__} from ({x}, {y}) to ({endx}, {endy})"
-                    )
-                    self.board[endx][endy] = piece
-                    self.board[x][y] = None
+                    if isinstance(board[x][y], Pawn) and abs(x - endx) == 2:
+                        if isinstance(board[endx][endy + 1], Pawn):
+                            self._set_square(endx, endy + 1, None)
+                            special_move = True
+                        elif isinstance(board[endx][endy - 1], Pawn):
+                            self._set_square(endx, endy - 1, None)
+                            special_move = True
 
-                # switch the turn
-                self.player_turn = "black" if self.player_turn == "white" else "white"
-                logger.info("Move successful")
+                # the rook is moved once the king has moved
+                special_move = special_move or is_castling
 
-                logger.debug(
-                    f"{piece.__class__.__name__} moved to ({endx}, {endy})"
-                    + (
-                        f", captured {captured_piece.__class__.__name__}"
-                        if captured_piece
-                        else ""
-                    )
-                )
+                self._commit_move(x, y, endx, endy, special_move, rook_move)
 
-                logger.debug(f"Valid Moves: {valid_moves}")
-                # Display the updated board
-                self.display_board_as_text()
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Valid Moves: {valid_moves}")
 
                 # If it's black's turn after a successful white move, make an automatic move
                 if self.player_turn == "black":
                     # Find all black pieces and their valid moves
                     black_moves = []
-                    for i in range(8):
-                        for j in range(8):
-                            piece = self.board[i][j]
-                            if piece and piece.colour == "black":
-                                moves = piece.get_valid_moves(self.board, i, j)
-                                for move in moves:
-                                    black_moves.append((i, j, move[0], move[1]))
+                    for i, j in sorted(self._pieces_by_colour["black"]):
+                        moves = board[i][j].get_valid_moves(board, i, j)
+                        for move in moves:
+                            black_moves.append((i, j, move[0], move[1]))
 
                     # Evaluate each move
                     best_move = None
                     best_score = float("-inf")
                     for move in black_moves:
                         # Check if move is legal (doesn't leave us in check)
-                        start_x, start_y, end_x, end_y = move
-                        temp_board = [[None for _ in range(8)] for _ in range(8)]
-                        for i in range(8):
-                            for j in range(8):
-                                piece = self.board[i][j]
-                                if piece:
-                                    piece_type = type(piece)
-                                    new_piece = piece_type(piece.colour)
-                                    for attr in dir(piece):
-                                        if not attr.startswith("__") and not callable(
-                                            getattr(piece, attr)
-                                        ):
-                                            setattr(
-                                                new_piece, attr, getattr(piece, attr)
-                                            )
-                                    temp_board[i][j] = new_piece
-
-                        temp_board[end_x][end_y] = temp_board[start_x][start_y]
-                        temp_board[start_x][start_y] = None
-
-                        if self.check_position(temp_board, "black") == 0:
+                        if self.leaves_king_safe(*move):
                             # Evaluate the move
-                            score = self.evaluate_move(self.board, move, "black")
+                            score = self.evaluate_move(board, move, "black")
                             if score > best_score:
                                 best_score = score
                                 best_move = move
@@ -629,9 +1179,15 @@ class ChessBoard:
                     if best_move:
                         start_x, start_y, end_x, end_y = best_move
                         logger.info(
-                            f"Black automatically moving from ({start_x}, {start_y}) to ({end_x}, {end_y}) with score {best_score}"
+                            "Black automatically moving from (%s, %s) to (%s, %s) with score %s",
+                            start_x,
+                            start_y,
+                            end_x,
+                            end_y,
+                            best_score,
                         )
-                        self.move_piece(start_x, start_y, end_x, end_y)
+                        # Already screened for legality above
+                        self._commit_move(start_x, start_y, end_x, end_y)
 
                 return True
         except Exception as e:
@@ -639,82 +1195,203 @@ class ChessBoard:
             sentry_sdk.capture_exception(e)
             return False
 
-    def check_position(self, board_state, player_colour):
-        """Check if a player is in check in a given board position"""
+    def _commit_move(self, x, y, endx, endy, special_move=False, rook_move=None):
+        """
+        Play a move that has already been validated.
+        Handles the capture, promotion, material, move count, turn and
+        shadow board. rook_move is the (from, to) column of a castling rook,
+        special_move rebuilds the shadow board instead of pushing the move
+        """
+        piece = self.board[x][y]
+        captured_piece = self.board[endx][endy]
+
+        # update the material
+        if captured_piece is not None:
+            self.material += captured_piece.weight
+
+        # increment the move count
+        self.move_count += 1
+
+        # Track the actual move operation
+        with _hot_operation(
+            "execute_move",
+            "move_execution",
+            tags={
+                "piece_type": piece.__class__.__name__,
+                "player": self.player_turn,
+            },
+        ):
+            logger.info(
+                "Moving piece: %s from (%s, %s) to (%s, %s)",
+                type(piece).__name__,
+                x,
+                y,
+                endx,
+                endy,
+            )
+            self._set_square(endx, endy, piece)
+            self._set_square(x, y, None)
+            if rook_move is not None:
+                rook_from, rook_to = rook_move
+                self._set_square(endx, rook_to, self.board[endx][rook_from])
+                self._set_square(endx, rook_from, None)
+
+        # handle pawn promotion once the pawn is on the last rank
+        if endx in (0, 7) and isinstance(piece, Pawn):
+            self.promote_pawn(endx, endy, piece=Queen)
+            special_move = True
+
+        self._push_book_move(x, y, endx, endy)
+
+        # switch the turn
+        self.player_turn = "black" if self.player_turn == "white" else "white"
+        if special_move:
+            self._shadow = self._build_shadow()
+        else:
+            self._push_shadow_move(x, y, endx, endy)
+        logger.info("Move successful")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"{piece.__class__.__name__} moved to ({endx}, {endy})"
+                + (
+                    f", captured {captured_piece.__class__.__name__}"
+                    if captured_piece
+                    else ""
+                )
+            )
+        # Display the updated board
+        self.display_board_as_text()
+
+    def _make(self, x, y, endx, endy):
+        """
+        Move a piece in place for a legality test and return whatever it
+        captured. Only self.board and the code grid change, so undo it
+        with _unmake
+        """
+        board = self.board
+        captured = board[endx][endy]
+        board[endx][endy] = board[x][y]
+        board[x][y] = None
+        codes = self._codes
+        codes[endx, endy] = codes[x, y]
+        codes[x, y] = 0
+        return captured
+
+    def _unmake(self, x, y, endx, endy, captured):
+        """Undo a _make, putting back the moved and captured pieces"""
+        board = self.board
+        board[x][y] = board[endx][endy]
+        board[endx][endy] = captured
+        codes = self._codes
+        codes[x, y] = codes[endx, endy]
+        codes[endx, endy] = 0 if captured is None else PIECE_CODES[captured.symbol]
+
+    def pseudo_legal_moves(self, colour):
+        """
+        Return ((x, y), (endx, endy)) for every move of colour's pieces,
+        without checking whether it leaves the king in check. Generated on
+        the compiled code grid when Numba is installed
+        """
+        board = self.board
+        if NUMBA_AVAILABLE:
+            # Pawns only double step while first_move is set
+            double_step = np.zeros((8, 8), dtype=np.bool_)
+            pawns = self.bb[colour, "P"]
+            while pawns:
+                square = (pawns & -pawns).bit_length() - 1
+                pawns &= pawns - 1
+                double_step[square >> 3, square & 7] = board[square >> 3][
+                    square & 7
+                ].first_move
+            sign = 1 if colour == "white" else -1
+            return [
+                ((x, y), (endx, endy))
+                for x, y, endx, endy in _pseudo_legal_codes(
+                    self._codes, sign, double_step
+                ).tolist()
+            ]
+
+        # Visit only our own pieces, lowest square first. Sliders read their
+        # moves off the ray tables
+        moves = []
+        own = 0
+        for letter in "PNBRQK":
+            own |= self.bb[colour, letter]
+        pieces = own
+        while pieces:
+            square = (pieces & -pieces).bit_length() - 1
+            pieces &= pieces - 1
+            x, y = square >> 3, square & 7
+            piece = board[x][y]
+            walks = PIECE_WALKS.get(type(piece))
+            if walks is None:
+                targets = piece.get_valid_moves(board, x, y)
+            else:
+                targets = _ray_targets(square, self.occupied, own, walks)
+            for move in targets:
+                moves.append(((x, y), move))
+        return moves
+
+    def leaves_king_safe(self, x, y, endx, endy):
+        """
+        Return True if moving the piece on (x, y) to (endx, endy) does not
+        leave its own king in check. The move is made in place and undone
+        """
+        board = self.board
+        piece = board[x][y]
+        colour = piece.colour
+        # The bitboards still hold the pre-move king square
+        if type(piece) is King:
+            king_x, king_y = endx, endy
+        else:
+            king_position = self.get_king_position(colour)
+            if king_position is None:
+                return True
+            king_x, king_y = king_position
+        opponent = "black" if colour == "white" else "white"
+
+        captured = self._make(x, y, endx, endy)
+        try:
+            return not self._square_attacked_by(board, king_x, king_y, opponent)
+        finally:
+            self._unmake(x, y, endx, endy, captured)
+
+    def check_position(self, board_state, player_colour, king_position=None):
+        """
+        Check if a player is in check in a given board position.
+        The king is searched for unless its position is passed in
+        """
         try:
             # Find the king's position
-            king_position = None
-            for x in range(8):
-                for y in range(8):
-                    piece = board_state[x][y]
-                    if isinstance(piece, King) and piece.colour == player_colour:
-                        king_position = (x, y)
+            if king_position is None:
+                for x, row in enumerate(board_state):
+                    for y, piece in enumerate(row):
+                        if isinstance(piece, King) and piece.colour == player_colour:
+                            king_position = (x, y)
+                            break
+                    if king_position:
                         break
-                if king_position:
-                    break
 
             if not king_position:
                 logger.warning(f"No {player_colour} king found on the board")
                 return 0
 
             king_x, king_y = king_position
-            logger.debug(
-                f"Checking if {player_colour} king at ({king_x}, {king_y}) is in check"
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Checking if {player_colour} king at ({king_x}, {king_y}) is in check"
+                )
 
-            # Check if any opponent piece can attack the king
-            for x in range(8):
-                for y in range(8):
-                    piece = board_state[x][y]
-                    if piece is not None and piece.colour != player_colour:
-                        try:
-                            # Get valid moves for the piece
-                            valid_moves = piece.get_valid_moves(board_state, x, y)
-
-                            # If king's position is in valid moves, check if path is clear
-                            if (king_x, king_y) in valid_moves:
-                                # For sliding pieces (Queen, Rook, Bishop), verify path is clear
-                                if isinstance(piece, (Queen, Rook, Bishop)):
-                                    # Calculate direction vector
-                                    dx = (
-                                        0
-                                        if king_x == x
-                                        else (king_x - x) // abs(king_x - x)
-                                    )
-                                    dy = (
-                                        0
-                                        if king_y == y
-                                        else (king_y - y) // abs(king_y - y)
-                                    )
-
-                                    # Check each square in the path
-                                    curr_x, curr_y = x + dx, y + dy
-                                    path_clear = True
-
-                                    while (curr_x, curr_y) != (king_x, king_y):
-                                        if board_state[curr_x][curr_y] is not None:
-                                            path_clear = False
-                                            break
-                                        curr_x += dx
-                                        curr_y += dy
-
-                                    if path_clear:
-                                        logger.debug(
-                                            f"{player_colour} king in check from {piece.__class__.__name__} at ({x}, {y})"
-                                        )
-                                        return 1  # Check
-                                else:  # For non-sliding pieces (Knight, Pawn)
-                                    logger.debug(
-                                        f"{player_colour} king in check from {piece.__class__.__name__} at ({x}, {y})"
-                                    )
-                                    return 1  # Check
-                        except Exception as e:
-                            logger.error(
-                                f"Error checking moves for piece at ({x},{y}): {e}"
-                            )
-                            continue
+            # Look outwards from the king for the first piece on each line
+            opponent = "black" if player_colour == "white" else "white"
+            if self._square_attacked_by(board_state, king_x, king_y, opponent):
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"{player_colour} king in check")
+                return 1  # Check
 
-            logger.debug(f"{player_colour} king is not in check")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"{player_colour} king is not in check")
             return 0  # No check
         except Exception as e:
             logger.error(f"Error checking position: {e}")
@@ -730,7 +1407,8 @@ class ChessBoard:
         logger.debug(self.board[x][y].__class__.__name__)
 
         colour = self.board[x][y].colour
-        self.board[x][y] = piece(colour)
+        promoted = SHARED_PIECES.get((piece, colour))
+        self._set_square(x, y, promoted if promoted is not None else piece(colour))
 
     """
     Takes No arguments and returns a number based on weather the player is in check
@@ -750,15 +1428,14 @@ class ChessBoard:
     """
 
     def get_king_position(self, colour):
-        for x in range(8):
-            for y in range(8):
-                if (
-                    isinstance(self.board[x][y], King)
-                    and self.board[x][y].colour == colour
-                ):
-                    position = (x, y)
-                    logger.debug(f"King position for {colour}: {position}")
-                    return position
+        king_bb = self.bb[colour, "K"]
+        if not king_bb:
+            return None
+        square = king_bb.bit_length() - 1
+        position = (square >> 3, square & 7)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"King position for {colour}: {position}")
+        return position
 
     """
     Takes the colour of the player
@@ -768,50 +1445,36 @@ class ChessBoard:
     0 for no check
     """
 
-    @track_performance(op="check", name="check_status")
+    @_hot_track(op="check", name="check_status")
     def are_you_in_check(self, player_colour):
         try:
-            with sentry_sdk.start_span(
-                op="chess.check_status", description=f"Check status for {player_colour}"
-            ) as _:
-                _.set_tag("player_color", player_colour)
+            with _hot_span(
+                "chess.check_status", "Check status for %s", player_colour
+            ) as span:
+                if span is not None:
+                    span.set_tag("player_color", player_colour)
 
                 king_position = self.get_king_position(player_colour)
                 if not king_position:
                     logger.warning(f"No {player_colour} king found on the board")
                     return 0
 
-                king_x, king_y = king_position
-                logger.debug(
-                    f"Checking if {player_colour} king at ({king_x}, {king_y}) is in check"
-                )
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"Checking if {player_colour} king at {king_position} is in check"
+                    )
 
-                # Check if any of the opponent's pieces can move to the king's position
-                for x in range(8):
-                    for y in range(8):
-                        piece = self.board[x][y]
-                        if piece is not None and piece.colour != player_colour:
-                            try:
-                                valid_moves = piece.get_valid_moves(self.board, x, y)
-                                # Check if king's position is in the valid moves
-                                if (king_x, king_y) in valid_moves:
-                                    logger.debug(
-                                        f"King in check from {piece.__class__.__name__} at ({x}, {y})"
-                                    )
-                                    # Check for checkmate
-                                    if self.is_checkmate(player_colour, king_position):
-                                        logger.info(
-                                            f"{player_colour} king is in checkmate"
-                                        )
-                                        return 2  # Checkmate
-                                    logger.info(f"{player_colour} king is in check")
-                                    return 1  # Check
-                            except Exception as e:
-                                logger.error(
-                                    f"Error checking moves for piece at ({x},{y}): {e}"
-                                )
-                                continue
-                logger.debug(f"{player_colour} king is not in check")
+                # Check if any of the opponent's pieces attack the king's square
+                opponent = "black" if player_colour == "white" else "white"
+                if self._attackers_to(*king_position, opponent):
+                    # Check for checkmate
+                    if self.is_checkmate(player_colour, king_position):
+                        logger.info("%s king is in checkmate", player_colour)
+                        return 2  # Checkmate
+                    logger.info("%s king is in check", player_colour)
+                    return 1  # Check
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"{player_colour} king is not in check")
                 return 0  # No check
         except Exception as e:
             logger.error(f"Error checking check status: {e}")
@@ -821,55 +1484,57 @@ class ChessBoard:
     def is_checkmate(self, player_colour, king_position):
         """Check if the king is in checkmate"""
         try:
-            with sentry_sdk.start_span(
-                op="chess.checkmate_check",
-                description=f"Check checkmate for {player_colour}",
-            ) as _:
-                _.set_tag("player_color", player_colour)
-                _.set_tag("king_position", f"{king_position[0]},{king_position[1]}")
+            with _hot_span(
+                "chess.checkmate_check", "Check checkmate for %s", player_colour
+            ) as span:
+                if span is not None:
+                    span.set_tag("player_color", player_colour)
+                    span.set_tag(
+                        "king_position", f"{king_position[0]},{king_position[1]}"
+                    )
 
                 king_x, king_y = king_position
-                logger.debug(
-                    f"Checking if {player_colour} king at ({king_x}, {king_y}) is in checkmate"
-                )
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"Checking if {player_colour} king at ({king_x}, {king_y}) is in checkmate"
+                    )
 
                 # First check if any other piece can capture the attacking piece or block the check
-                attacking_pieces = []
+                opponent = "black" if player_colour == "white" else "white"
+                attackers = self._attackers_to(king_x, king_y, opponent)
                 attacking_positions = []
-
-                # Find all pieces attacking the king
-                for x in range(8):
-                    for y in range(8):
-                        piece = self.board[x][y]
-                        if piece and piece.colour != player_colour:
-                            try:
-                                valid_moves = piece.get_valid_moves(self.board, x, y)
-                                if (king_x, king_y) in valid_moves:
-                                    attacking_pieces.append((x, y))
-                                    attacking_positions.append((x, y))
-                            except Exception:
-                                continue
+                while attackers:
+                    square = (attackers & -attackers).bit_length() - 1
+                    attacking_positions.append((square >> 3, square & 7))
+                    attackers &= attackers - 1
+
+                # In double check only a king move can help, so skip the captures
+                if len(attacking_positions) > 1:
+                    friendly_squares = ()
+                else:
+                    friendly_squares = self._pieces_by_colour.get(player_colour, ())
 
                 # For each friendly piece, see if it can capture an attacking piece or block the check
-                for x in range(8):
-                    for y in range(8):
-                        piece = self.board[x][y]
-                        if (
-                            piece
-                            and piece.colour == player_colour
-                            and not isinstance(piece, King)
-                        ):
-                            try:
-                                valid_moves = piece.get_valid_moves(self.board, x, y)
-                                for attack_pos in attacking_positions:
-                                    if attack_pos in valid_moves:
-                                        # Can capture attacking piece
+                for x, y in friendly_squares:
+                    piece = self.board[x][y]
+                    if (
+                        piece
+                        and piece.colour == player_colour
+                        and not isinstance(piece, King)
+                    ):
+                        try:
+                            for attack_x, attack_y in attacking_positions:
+                                if piece.can_attack(
+                                    self.board, x, y, attack_x, attack_y
+                                ):
+                                    # Can capture attacking piece
+                                    if logger.isEnabledFor(logging.DEBUG):
                                         logger.debug(
                                             f"Checkmate prevented: {piece.__class__.__name__} at ({x}, {y}) can capture attacking piece"
                                         )
-                                        return False
-                            except Exception:
-                                continue
+                                    return False
+                        except Exception:
+                            continue
 
                 # Try all possible king moves
                 king = self.board[king_x][king_y]
@@ -882,40 +1547,24 @@ class ChessBoard:
                 except Exception:
                     return False
 
-                # For each potential king move, see if it's still in check
+                # For each potential king move, see if it's still in check.
+                # Lifting the king off its square lets sliders see through it
+                occupied = self.occupied & ~(1 << ((king_x << 3) | king_y))
                 for move_x, move_y in king_moves:
-                    # Make temporary move
-                    temp_board = copy.deepcopy(self.board)
-                    temp_board[move_x][move_y] = temp_board[king_x][king_y]
-                    temp_board[king_x][king_y] = None
-
-                    # Check if this position is still in check
-                    still_in_check = False
-                    for x in range(8):
-                        for y in range(8):
-                            piece = temp_board[x][y]
-                            if piece and piece.colour != player_colour:
-                                try:
-                                    valid_moves = piece.get_valid_moves(
-                                        temp_board, x, y
-                                    )
-                                    if (move_x, move_y) in valid_moves:
-                                        still_in_check = True
-                                        break
-                                except Exception:
-                                    continue
-                        if still_in_check:
-                            break
+                    still_in_check = self._attackers_to(
+                        move_x, move_y, opponent, occupied
+                    )
 
                     if not still_in_check:
                         # Found a safe move for the king
-                        logger.debug(
-                            f"Checkmate prevented: King can move to ({move_x}, {move_y})"
-                        )
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(
+                                f"Checkmate prevented: King can move to ({move_x}, {move_y})"
+                            )
                         return False
 
                 logger.info(
-                    f"{player_colour} king is in checkmate - no legal moves available"
+                    "%s king is in checkmate - no legal moves available", player_colour
                 )
                 return True  # No escape moves found - checkmate
         except Exception as e:
@@ -923,190 +1572,247 @@ class ChessBoard:
             sentry_sdk.capture_exception(e)
             return False
 
-    def evaluate_position(self, board_state, color):
-        """Evaluate the position for the given color"""
-        score = 0
+    def _attackers_to(self, x, y, by_colour, occupied=None):
+        """
+        Returns a bitboard of the by_colour pieces attacking (x, y).
+        Reads the maintained bitboards, so it describes the committed
+        position and not a trial move made with _make. Sliders are blocked
+        by occupied, which defaults to every piece on the board
+        """
+        square = (x << 3) | y
+        bb = self.bb
+        if occupied is None:
+            occupied = self.occupied
+        attackers = (
+            (KNIGHT_ATTACKS[square] & bb[by_colour, "N"])
+            | (KING_ATTACKS[square] & bb[by_colour, "K"])
+            | (PAWN_ATTACKERS[by_colour][square] & bb[by_colour, "P"])
+        )
+        queens = bb[by_colour, "Q"]
+        for rays, sliders in (
+            (ROOK_RAYS, bb[by_colour, "R"] | queens),
+            (BISHOP_RAYS, bb[by_colour, "B"] | queens),
+        ):
+            if not sliders:
+                continue
+            for ascending, table in rays:
+                blockers = table[square] & occupied
+                if blockers:
+                    if ascending:
+                        nearest = blockers & -blockers
+                    else:
+                        nearest = 1 << (blockers.bit_length() - 1)
+                    attackers |= nearest & sliders
+        return attackers
+
+    def _is_attacked(self, target_x, target_y, player_colour):
+        """Return True if an opponent piece attacks the target square"""
+        opponent = "black" if player_colour == "white" else "white"
+        return self._square_attacked_by(self.board, target_x, target_y, opponent)
+
+    def _square_attacked_by(self, board, x, y, by_colour):
+        """
+        Return True if a by_colour piece attacks (x, y).
+        Walks out from the square and only looks at the first piece on each
+        ray, the knight squares and the two pawn squares. Queries on
+        self.board run on the compiled code grid when Numba is installed
+        """
+        if NUMBA_AVAILABLE and board is self.board:
+            enemy_sign = 1 if by_colour == "white" else -1
+            return _square_attacked_codes(self._codes, x, y, enemy_sign)
+
+        for directions, sliders in SLIDER_RAYS:
+            for dx, dy in directions:
+                nx, ny = x + dx, y + dy
+                adjacent = True
+                while 0 <= nx < 8 and 0 <= ny < 8:
+                    piece = board[nx][ny]
+                    if piece is not None:
+                        if piece.colour == by_colour and (
+                            isinstance(piece, sliders)
+                            or (adjacent and isinstance(piece, King))
+                        ):
+                            return True
+                        break
+                    nx, ny = nx + dx, ny + dy
+                    adjacent = False
+
+        for dx, dy in KNIGHT_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 8 and 0 <= ny < 8:
+                piece = board[nx][ny]
+                if isinstance(piece, Knight) and piece.colour == by_colour:
+                    return True
+
+        # White pawns capture towards higher x, so they sit one rank below
+        pawn_x = x - 1 if by_colour == "white" else x + 1
+        if 0 <= pawn_x < 8:
+            for pawn_y in (y - 1, y + 1):
+                if 0 <= pawn_y < 8:
+                    piece = board[pawn_x][pawn_y]
+                    if isinstance(piece, Pawn) and piece.colour == by_colour:
+                        return True
+        return False
 
-        # Material value and piece-square tables
-        piece_values = {
-            Pawn: 100,
-            Knight: 320,
-            Bishop: 330,
-            Rook: 500,
-            Queen: 900,
-            King: 20000,
-        }
+    def evaluate_position(self, board_state, color, endgame=None, codes=None):
+        """
+        Evaluate the position for the given color. endgame and the piece
+        code grid of board_state can be passed in when the caller already
+        has them, otherwise they are worked out from board_state
+        """
+        if codes is None:
+            codes = np.array(
+                [
+                    [0 if piece is None else PIECE_CODES[piece.symbol] for piece in row]
+                    for row in board_state
+                ],
+                dtype=np.int8,
+            )
+        if endgame is None:
+            endgame = self.is_endgame(board_state)
+
+        # Everything but mobility only needs the piece codes
+        if NUMBA_AVAILABLE:
+            sign = 1 if color == "white" else -1
+            score = int(_evaluate_codes(codes, sign, endgame))
+            return score + self._mobility_score(board_state, color, endgame)
+
+        # Material and center control for both sides in one pass
+        score = int(PIECE_SQUARE_VALUES[codes + 6, _ROWS, _COLS].sum())
+        if color == "black":
+            score = -score
+
+        # Every pawn on the board as a bitboard, bit (x << 3) | y
+        pawn_squares = np.packbits(np.abs(codes).ravel() == 1, bitorder="little")
+        pawns = int.from_bytes(pawn_squares.tobytes(), "little")
+        passed_masks = PASSED_PAWN_MASKS[color]
+
+        # Position-based bonuses only count for our own pieces
+        for x, row in enumerate(board_state):
+            for y, piece in enumerate(row):
+                if piece is None or piece.colour != color:
+                    continue
+
+                kind = type(piece)
+                if kind is Pawn:
+                    # Advancement bonus
+                    if color == "white":
+                        score += 10 * (x - 1)  # Bonus for advancing
+                    else:
+                        score += 10 * (6 - x)  # Bonus for advancing
+
+                    # Passed pawn bonus, no pawn ahead on this or the next files
+                    if not pawns & passed_masks[(x << 3) | y]:
+                        score += 50
+
+                elif kind is Knight:
+                    # Outpost bonus - knight protected by pawn and can't be attacked by enemy pawns
+                    if color == "white" and x > 3:
+                        if (
+                            y > 0
+                            and isinstance(board_state[x - 1][y - 1], Pawn)
+                            and board_state[x - 1][y - 1].colour == color
+                        ):
+                            score += 30
+                    elif color == "black" and x < 4:
+                        if (
+                            y > 0
+                            and isinstance(board_state[x + 1][y - 1], Pawn)
+                            and board_state[x + 1][y - 1].colour == color
+                        ):
+                            score += 30
 
-        # Center control bonus
-        center_squares = [(3, 3), (3, 4), (4, 3), (4, 4)]
-        center_control = 30
-        extended_center_squares = [
-            (2, 2),
-            (2, 3),
-            (2, 4),
-            (2, 5),
-            (3, 2),
-            (3, 5),
-            (4, 2),
-            (4, 5),
-            (5, 2),
-            (5, 3),
-            (5, 4),
-            (5, 5),
-        ]
-        extended_center_control = 15
-
-        for x in range(8):
-            for y in range(8):
-                piece = board_state[x][y]
-                if piece is not None:
-                    multiplier = 1 if piece.colour == color else -1
-
-                    # Base material value
-                    score += piece_values[type(piece)] * multiplier
-
-                    # Position-based bonuses
-                    if isinstance(piece, Pawn):
-                        # Pawn structure
-                        if piece.colour == color:
-                            # Advancement bonus
-                            if color == "white":
-                                score += 10 * (x - 1)  # Bonus for advancing
-                            else:
-                                score += 10 * (6 - x)  # Bonus for advancing
-
-                            # Passed pawn bonus
-                            is_passed = True
-                            pawn_direction = 1 if color == "white" else -1
-                            for check_x in range(
-                                x + pawn_direction,
-                                8 if color == "white" else -1,
-                                pawn_direction,
-                            ):
-                                if 0 <= check_x < 8 and (
-                                    (
-                                        y > 0
-                                        and isinstance(
-                                            board_state[check_x][y - 1], Pawn
-                                        )
-                                    )
-                                    or isinstance(board_state[check_x][y], Pawn)
-                                    or (
-                                        y < 7
-                                        and isinstance(
-                                            board_state[check_x][y + 1], Pawn
-                                        )
-                                    )
-                                ):
-                                    is_passed = False
-                                    break
-                            if is_passed:
-                                score += 50
-
-                    elif isinstance(piece, Knight):
-                        # Knights are more valuable in closed positions
-                        if piece.colour == color:
-                            valid_moves = piece.get_valid_moves(board_state, x, y)
-                            score += len(valid_moves) * 10  # Mobility bonus
-
-                            # Outpost bonus - knight protected by pawn and can't be attacked by enemy pawns
-                            if color == "white" and x > 3:
-                                if (
-                                    y > 0
-                                    and isinstance(board_state[x - 1][y - 1], Pawn)
-                                    and board_state[x - 1][y - 1].colour == color
-                                ):
-                                    score += 30
-                            elif color == "black" and x < 4:
-                                if (
-                                    y > 0
-                                    and isinstance(board_state[x + 1][y - 1], Pawn)
-                                    and board_state[x + 1][y - 1].colour == color
-                                ):
-                                    score += 30
-
-                    elif isinstance(piece, Bishop):
-                        if piece.colour == color:
-                            valid_moves = piece.get_valid_moves(board_state, x, y)
-                            score += len(valid_moves) * 8  # Mobility bonus
-
-                    elif isinstance(piece, Rook):
-                        if piece.colour == color:
-                            # Bonus for rooks on open files
-                            open_file = True
-                            for check_x in range(8):
-                                if isinstance(board_state[check_x][y], Pawn):
-                                    open_file = False
-                                    break
-                            if open_file:
-                                score += 30
-
-                    elif isinstance(piece, Queen):
-                        if piece.colour == color:
-                            valid_moves = piece.get_valid_moves(board_state, x, y)
-                            score += len(valid_moves) * 5  # Mobility bonus
-
-                    elif isinstance(piece, King):
-                        if piece.colour == color:
-                            # King safety
-                            if self.is_endgame(board_state):
-                                # King should be active in endgame
-                                valid_moves = piece.get_valid_moves(board_state, x, y)
-                                score += len(valid_moves) * 8
-                            else:
-                                # King safety in middlegame
-                                if color == "white" and x < 2:
-                                    score += 60  # Bonus for castled position
-                                elif color == "black" and x > 5:
-                                    score += 60  # Bonus for castled position
-
-                    # Center control
-                    if (x, y) in center_squares:
-                        score += center_control * multiplier
-                    elif (x, y) in extended_center_squares:
-                        score += extended_center_control * multiplier
+                elif kind is Rook:
+                    # Bonus for rooks on open files
+                    if not pawns & FILE_MASKS[y]:
+                        score += 30
+
+                elif kind is King and not endgame:
+                    # King safety in middlegame
+                    if color == "white" and x < 2:
+                        score += 60  # Bonus for castled position
+                    elif color == "black" and x > 5:
+                        score += 60  # Bonus for castled position
+
+        return score + self._mobility_score(board_state, color, endgame)
 
+    def _mobility_score(self, board_state, color, endgame):
+        """Bonus for the number of valid moves of color's pieces"""
+        score = 0
+        for x, row in enumerate(board_state):
+            for y, piece in enumerate(row):
+                if piece is None or piece.colour != color:
+                    continue
+                weight = MOBILITY_WEIGHTS.get(type(piece))
+                # The king should only be active in the endgame
+                if weight is None or (type(piece) is King and not endgame):
+                    continue
+                score += len(piece.get_valid_moves(board_state, x, y)) * weight
         return score
 
-    def is_endgame(self, board_state):
-        """Determine if the position is in endgame"""
-        queens = 0
-        minor_pieces = 0
-        for x in range(8):
-            for y in range(8):
-                piece = board_state[x][y]
-                if isinstance(piece, Queen):
-                    queens += 1
-                elif isinstance(piece, (Bishop, Knight)):
-                    minor_pieces += 1
+    def is_endgame(self, board_state, captured=None):
+        """
+        Determine if the position is in endgame, leaving out a piece that is
+        about to be captured. self.board is counted from the bitboards
+        """
+        if board_state is self.board:
+            queens, minor_pieces = self._piece_counts()
+        else:
+            queens = 0
+            minor_pieces = 0
+            for x, row in enumerate(board_state):
+                for y, piece in enumerate(row):
+                    if isinstance(piece, Queen):
+                        queens += 1
+                    elif isinstance(piece, (Bishop, Knight)):
+                        minor_pieces += 1
+        if isinstance(captured, Queen):
+            queens -= 1
+        elif isinstance(captured, (Bishop, Knight)):
+            minor_pieces -= 1
         return queens == 0 or (queens == 2 and minor_pieces <= 2)
 
+    def _piece_counts(self):
+        """Return the number of queens and minor pieces on self.board"""
+        bb = self.bb
+        queens = bb["white", "Q"] | bb["black", "Q"]
+        minor_pieces = (
+            bb["white", "B"] | bb["black", "B"] | bb["white", "N"] | bb["black", "N"]
+        )
+        return queens.bit_count(), minor_pieces.bit_count()
+
+    def _snapshot_into(self, dst, src):
+        """Copy the squares of board src into board dst row by row"""
+        for dst_row, src_row in zip(dst, src):
+            dst_row[:] = src_row
+
     def evaluate_move(self, board_state, move, color):
         """Evaluate a specific move"""
         start_x, start_y, end_x, end_y = move
         score = 0
 
-        # Create a temporary board with the move applied
-        temp_board = [[None for _ in range(8)] for _ in range(8)]
-        for i in range(8):
-            for j in range(8):
-                piece = board_state[i][j]
-                if piece:
-                    piece_type = type(piece)
-                    new_piece = piece_type(piece.colour)
-                    for attr in dir(piece):
-                        if not attr.startswith("__") and not callable(
-                            getattr(piece, attr)
-                        ):
-                            setattr(new_piece, attr, getattr(piece, attr))
-                    temp_board[i][j] = new_piece
+        # Apply the move on the scratch board. evaluate_position only reads
+        # pieces, so copying the rows is enough
+        temp_board = self._scratch_board
+        self._snapshot_into(temp_board, board_state)
+
+        # Judge the endgame before the move, counting the piece it captures
+        endgame = self.is_endgame(board_state, board_state[end_x][end_y])
 
         # Apply the move
         temp_board[end_x][end_y] = temp_board[start_x][start_y]
         temp_board[start_x][start_y] = None
 
+        # The code grid of self.board is kept up to date, so move on a copy
+        codes = None
+        if board_state is self.board:
+            codes = self._scratch_codes
+            codes[:] = self._codes
+            codes[end_x, end_y] = codes[start_x, start_y]
+            codes[start_x, start_y] = 0
+
         # Get the position evaluation after the move
-        score = self.evaluate_position(temp_board, color)
+        score = self.evaluate_position(temp_board, color, endgame, codes)
 
         # Additional move-specific considerations
         piece = board_state[start_x][start_y]
@@ -1156,9 +1862,8 @@ class ChessBoard:
             logger.info(f"Elapsed time: {elapsed_time:.2f} seconds")
             logger.info(f"{self.player_turn.capitalize()} to move")
             x, y, endx, endy = map(int, input("Enter move: ").split())
-            if self.move_piece(x, y, endx, endy):
-                self.player_turn = "black" if self.player_turn == "white" else "white"
-            else:
+            # move_piece hands the turn over itself
+            if not self.move_piece(x, y, endx, endy):
                 logger.warning("Invalid move")
         logger.info("Game over")
 
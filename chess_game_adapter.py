@@ -1,10 +1,40 @@
+import logging
 import traceback
+from operator import itemgetter
+
+import numpy as np
+
 from logging_config import get_logger
-from eval_board import eval_board
+from eval_board import eval_codes
 
 # Get logger
 logger = get_logger(__name__)
 
+# Positions whose legal moves are remembered, the oldest is dropped when full
+LEGAL_MOVE_CACHE_SIZE = 100_000
+# Positions whose check status is remembered, the oldest is dropped when full
+CHECK_TABLE_SIZE = 100_000
+
+# Capture ordering, most valuable victim first then least valuable attacker,
+# indexed [victim][attacker] by piece code 0 (empty) to 6 (king)
+PIECE_WEIGHTS = (0, 1, 3, 3, 5, 9, 0)
+MVV_LVA = [
+    [victim * 10 - attacker if victim else 0 for attacker in PIECE_WEIGHTS]
+    for victim in PIECE_WEIGHTS
+]
+# bytes.translate table from a code grid's int8 bytes to FEN letters, with
+# black's negative codes wrapping round to the top of the table
+BOARD_GLYPHS = bytearray(b"." * 256)
+for _code, _letter in enumerate(b"PNBRQK", start=1):
+    BOARD_GLYPHS[_code] = _letter
+    BOARD_GLYPHS[256 - _code] = _letter | 0x20
+BOARD_GLYPHS = bytes(BOARD_GLYPHS)
+
+# Bonus for moves onto the center squares, indexed [x][y]
+CENTER_MOVE_BONUS = [
+    [5 if 2 <= x <= 5 and 2 <= y <= 5 else 0 for y in range(8)] for x in range(8)
+]
+
 
 class ChessGameAdapter:
     """
@@ -12,50 +42,47 @@ class ChessGameAdapter:
     Provides the interface expected by MCTS: is_terminal, get_legal_moves, apply_move, etc.
     """
 
-    def __init__(self, chess_board):
+    def __init__(self, chess_board, debug=False):
         self.chess_board = chess_board
-        # Debug current board layout to understand piece positions
-        self.debug_board_layout(self.chess_board.board)
+        # Legal moves and check status keyed by (Zobrist hash, colour)
+        self._legal_cache = {}
+        self._check_tt = {}
+        # Dumping the board is opt-in, adapters are created during search
+        if debug:
+            self.debug_board_layout(self.chess_board)
 
     def debug_board_layout(self, board):
-        """Print the current board layout to understand piece positions"""
+        """Print the layout of a ChessBoard to understand piece positions"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info("Current board layout:")
-        piece_map = {
-            "white": {
-                "Pawn": "P",
-                "Rook": "R",
-                "Knight": "N",
-                "Bishop": "B",
-                "Queen": "Q",
-                "King": "K",
-            },
-            "black": {
-                "Pawn": "p",
-                "Rook": "r",
-                "Knight": "n",
-                "Bishop": "b",
-                "Queen": "q",
-                "King": "k",
-            },
-        }
-
-        board_representation = []
-        for row_idx, row in enumerate(board):
-            row_str = f"{row_idx} "
-            for piece in row:
-                if piece is None:
-                    row_str += "."
-                else:
-                    piece_type = piece.__class__.__name__
-                    color = piece.colour
-                    row_str += piece_map[color][piece_type]
-                row_str += " "
-            board_representation.append(row_str)
+
+        # One translate per rank of the code grid
+        board_representation = [
+            f"{row_idx} "
+            + " ".join(row.tobytes().translate(BOARD_GLYPHS).decode())
+            + " "
+            for row_idx, row in enumerate(board._codes)
+        ]
 
         # Log the entire board at once
         logger.info("\n" + "\n".join(board_representation))
         logger.info("  0 1 2 3 4 5 6 7")
-        logger.info(f"Current player turn: {self.chess_board.player_turn}")
+        logger.info("Current player turn: %s", self.chess_board.player_turn)
+
+    def check_status(self, board, colour):
+        """
+        board.are_you_in_check(colour) remembered per position, so positions
+        reached again through another move order are not scanned twice
+        """
+        key = (board.zobrist, colour)
+        status = self._check_tt.get(key)
+        if status is None:
+            status = board.are_you_in_check(colour)
+            if len(self._check_tt) >= CHECK_TABLE_SIZE:
+                del self._check_tt[next(iter(self._check_tt))]
+            self._check_tt[key] = status
+        return status
 
     def is_terminal(self, board):
         """Check if the state represents a terminal state"""
@@ -64,60 +91,36 @@ class ChessGameAdapter:
     def get_legal_moves(self, board):
         """Get all legal moves from the current state"""
         try:
-            all_moves = []
-            # Find king position first
-            king_position = None
-            for i in range(8):
-                for j in range(8):
-                    piece = board.board[i][j]
-                    if (
-                        piece
-                        and piece.__class__.__name__ == "King"
-                        and piece.colour == board.player_turn
-                    ):
-                        king_position = (i, j)
-                        break
-                if king_position:
-                    break
-
-            if not king_position:
-                logger.warning(f"No {board.player_turn} king found on the board")
+            turn = board.player_turn
+            key = (board.zobrist, turn)
+            cached = self._legal_cache.get(key)
+            if cached is not None:
+                return list(cached)
+
+            scored = []
+
+            # The king square comes straight from its bitboard
+            if not board.get_king_position(turn):
+                logger.warning(f"No {turn} king found on the board")
                 return []
 
             # Check if we're currently in check
-            current_check_status = board.are_you_in_check(board.player_turn)
-            logger.debug(f"Current check status: {current_check_status}")
-
-            # Get all potential moves
-            for x in range(8):
-                for y in range(8):
-                    piece = board.board[x][y]
-                    if piece and piece.colour == board.player_turn:
-                        # Get valid moves using the piece's method directly
-                        valid_moves = piece.get_valid_moves(board.board, x, y)
-                        for move in valid_moves:
-                            # Create a temporary board to test the move
-                            temp_board = board.clone()
-                            if temp_board.move_piece(x, y, move[0], move[1]):
-                                # If we're in check, only add moves that get us out of check
-                                if current_check_status > 0:
-                                    if (
-                                        temp_board.are_you_in_check(board.player_turn)
-                                        == 0
-                                    ):
-                                        all_moves.append(((x, y), move))
-                                        logger.debug(
-                                            f"Found escape move from check: ({x},{y}) to {move}"
-                                        )
-                                else:
-                                    # If we're not in check, add moves that don't put us in check
-                                    if (
-                                        temp_board.are_you_in_check(board.player_turn)
-                                        == 0
-                                    ):
-                                        all_moves.append(((x, y), move))
-
-            if not all_moves:
+            current_check_status = self.check_status(board, turn)
+            logger.debug("Current check status: %s", current_check_status)
+
+            # Keep only the moves that leave our king out of check, each one
+            # is tried in place. Captures are scored MVV-LVA as they are found,
+            # plus a bonus for reaching the center
+            codes = board._codes.tolist()
+            for move in board.pseudo_legal_moves(turn):
+                (x, y), (to_x, to_y) = move
+                if board.leaves_king_safe(x, y, to_x, to_y):
+                    score = MVV_LVA[abs(codes[to_x][to_y])][abs(codes[x][y])]
+                    scored.append((score + CENTER_MOVE_BONUS[to_x][to_y], move))
+                    if current_check_status > 0:
+                        logger.debug("Found escape move from check: %s", move)
+
+            if not scored:
                 if current_check_status > 0:
                     logger.warning(
                         "No legal moves found to escape check - possible checkmate"
@@ -125,23 +128,14 @@ class ChessGameAdapter:
                 else:
                     logger.warning("No legal moves found - possible stalemate")
 
-            # Prioritize moves that capture pieces or control the center
-            def move_score(move):
-                from_pos, to_pos = move
-                to_x, to_y = to_pos
-                # Check if move captures a piece
-                target_piece = board.board[to_x][to_y]
-                score = 0
-                if target_piece:
-                    score += target_piece.weight * 10  # Prioritize captures
-                # Bonus for controlling center squares
-                if 2 <= to_x <= 5 and 2 <= to_y <= 5:
-                    score += 5
-                return score
-
             # Sort moves by score, highest first
-            all_moves.sort(key=move_score, reverse=True)
-            return all_moves
+            scored.sort(key=itemgetter(0), reverse=True)
+            all_moves = [move for _, move in scored]
+
+            if len(self._legal_cache) >= LEGAL_MOVE_CACHE_SIZE:
+                del self._legal_cache[next(iter(self._legal_cache))]
+            self._legal_cache[key] = all_moves
+            return list(all_moves)
 
         except Exception as e:
             logger.error(f"Error in get_legal_moves: {e}\n{traceback.format_exc()}")
@@ -161,60 +155,42 @@ class ChessGameAdapter:
 
     def get_reward(self, board, is_white):
         """Calculate the reward for the current board state."""
-        try:
-            # Find king position for the current player
-            king_color = "white" if is_white else "black"
-            king_position = None
-            for i in range(8):
-                for j in range(8):
-                    piece = board.board[i][j]
-                    if (
-                        piece
-                        and piece.__class__.__name__ == "King"
-                        and piece.colour == king_color
-                    ):
-                        king_position = (i, j)
-                        break
-                if king_position:
-                    break
-
-            if not king_position:
-                logger.warning(f"No {king_color} king found on the board")
-                return 0.0
-
-            # Check for checkmate using the king's position
-            if board.is_checkmate(is_white, king_position):
-                return -1.0  # Loss
-
-            # Find opponent's king position
-            opponent_king_position = None
-            opponent_color = "black" if is_white else "white"
-            for i in range(8):
-                for j in range(8):
-                    piece = board.board[i][j]
-                    if (
-                        piece
-                        and piece.__class__.__name__ == "King"
-                        and piece.colour == opponent_color
-                    ):
-                        opponent_king_position = (i, j)
-                        break
-                if opponent_king_position:
-                    break
-
-            if opponent_king_position and board.is_checkmate(
-                not is_white, opponent_king_position
-            ):
-                return 1.0  # Win
-
-            # Get position evaluation from eval_board
-            score = eval_board(
-                board.board, "white" if is_white else "black", score_normalised=True
+        return self.get_rewards_batch([board], is_white)[0]
+
+    def get_rewards_batch(self, boards, is_white):
+        """
+        Calculate the rewards for several board states at once. Checkmates
+        are settled per board, the rest are scored together in one numpy pass
+        """
+        king_color = "white" if is_white else "black"
+        opponent_color = "black" if is_white else "white"
+        rewards = [0.0] * len(boards)
+        to_score = []
+        for index, board in enumerate(boards):
+            try:
+                if not board.get_king_position(king_color):
+                    logger.warning(f"No {king_color} king found on the board")
+                    continue
+
+                # Checkmate is only looked for when the king is attacked
+                if self.check_status(board, king_color) == 2:
+                    rewards[index] = -1.0  # Loss
+                elif self.check_status(board, opponent_color) == 2:
+                    rewards[index] = 1.0  # Win
+                else:
+                    to_score.append(index)
+            except Exception as e:
+                logger.error(
+                    f"Error in get_rewards_batch: {e}\n{traceback.format_exc()}"
+                )
+
+        if to_score:
+            # Normalized position scores between -1 and 1
+            scores = eval_codes(
+                np.stack([boards[index]._codes for index in to_score]),
+                king_color,
+                score_normalised=True,
             )
-
-            # Return normalized score between -1 and 1
-            return score
-
-        except Exception as e:
-            logger.error(f"Error in get_reward: {e}\n{traceback.format_exc()}")
-            return 0.0  # Return neutral score on error
+            for index, score in zip(to_score, scores):
+                rewards[index] = float(score)
+        return rewards
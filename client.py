@@ -1,9 +1,8 @@
 import asyncio
-import pickle
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
 from PyQt5.QtWidgets import QApplication
 from online.networked_chess_board import NetworkedChessBoard
-from online.network_gui import NetworkedChessBoardUI
+from online.network_gui import NetworkedChessBoardUI, decode_move
 from login_window import LoginWindow
 import websockets
 import sys
@@ -19,9 +18,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def message_type(data):
+    """
+    The "type" of a JSON frame from the server. A bare list is a move,
+    anything that is not a JSON object or list has no type (None)
+    """
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return None
+    if isinstance(message, list):
+        return "move"
+    if isinstance(message, dict):
+        return message.get("type")
+    return None
+
+
 class WebSocketThread(QThread):
     data_received = pyqtSignal(bytes)
-    move_to_send = None
 
     def __init__(self, websocket_url: str, username: str):
         super().__init__()
@@ -29,19 +43,42 @@ class WebSocketThread(QThread):
         self.username = username
         self.websocket = None
         self.running = True
+        # The thread's event loop and the moves waiting to be sent on it
+        self.loop = asyncio.new_event_loop()
+        self.send_queue = asyncio.Queue()
 
     async def connect_and_receive(self):
         """Main async method for websocket operations"""
         async with websockets.connect(self.websocket_url) as websocket:
             self.websocket = websocket
+            # Wait on the socket and the send queue together, so queued moves
+            # go out without waiting for the next incoming message
+            receive = asyncio.ensure_future(websocket.recv())
+            send = asyncio.ensure_future(self.send_queue.get())
             while self.running:
                 try:
-                    # Use _ for unused variable
-                    _ = await websocket.receive()
-                    # Handle message...
+                    done, _ = await asyncio.wait(
+                        {receive, send}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if send in done:
+                        await websocket.send(json.dumps(send.result()))
+                        send = asyncio.ensure_future(self.send_queue.get())
+                    if receive in done:
+                        data = receive.result()
+                        if isinstance(data, str):
+                            data = data.encode()
+                        # Only moves go to the board, other frames are logged
+                        frame_type = message_type(data)
+                        if frame_type == "move":
+                            self.data_received.emit(data)
+                        else:
+                            logger.info(f"Ignoring {frame_type} frame from server")
+                        receive = asyncio.ensure_future(websocket.recv())
                 except Exception:
                     self.running = False
                     break
+            receive.cancel()
+            send.cancel()
 
     async def stop(self):
         """Async method to stop the websocket connection"""
@@ -51,13 +88,12 @@ class WebSocketThread(QThread):
 
     def run(self):
         """Run in thread context"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(self.connect_and_receive())
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.connect_and_receive())
 
     def queue_move(self, move_data):
         """Queue a move to be sent in the websocket thread"""
-        self.move_to_send = move_data
+        self.loop.call_soon_threadsafe(self.send_queue.put_nowait, move_data)
 
 
 class ChessClient(QObject):
@@ -82,7 +118,11 @@ class ChessClient(QObject):
 
     def handle_data(self, data: bytes):
         try:
-            move = pickle.loads(data)
+            move = decode_move(data)
+        except ValueError as e:
+            logger.error(f"Rejected move: {e}")
+            return
+        try:
             self.chess_board.move_piece(*move)
             self.chess_board_ui.update_ui()
         except Exception as e:
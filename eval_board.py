@@ -1,8 +1,128 @@
+import numpy as np
+
 from logging_config import get_logger
 
 # Get logger
 logger = get_logger(__name__)
 
+# Piece values
+PIECE_VALUES = {
+    "Pawn": 100,
+    "Knight": 320,
+    "Bishop": 330,
+    "Rook": 500,
+    "Queen": 900,
+    "King": 20000,
+}
+
+# Position bonuses for each piece type
+PAWN_BONUS = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [5, 10, 10, -20, -20, 10, 10, 5],
+    [5, -5, -10, 0, 0, -10, -5, 5],
+    [0, 0, 0, 20, 20, 0, 0, 0],
+    [5, 5, 10, 25, 25, 10, 5, 5],
+    [10, 10, 20, 30, 30, 20, 10, 10],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+]
+
+KNIGHT_BONUS = [
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+    [-40, -20, 0, 0, 0, 0, -20, -40],
+    [-30, 0, 10, 15, 15, 10, 0, -30],
+    [-30, 5, 15, 20, 20, 15, 5, -30],
+    [-30, 0, 15, 20, 20, 15, 0, -30],
+    [-30, 5, 10, 15, 15, 10, 5, -30],
+    [-40, -20, 0, 5, 5, 0, -20, -40],
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+]
+
+BISHOP_BONUS = [
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 10, 10, 5, 0, -10],
+    [-10, 5, 5, 10, 10, 5, 5, -10],
+    [-10, 0, 10, 10, 10, 10, 0, -10],
+    [-10, 10, 10, 10, 10, 10, 10, -10],
+    [-10, 5, 0, 0, 0, 0, 5, -10],
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+]
+
+ROOK_BONUS = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [5, 10, 10, 10, 10, 10, 10, 5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [0, 0, 0, 5, 5, 0, 0, 0],
+]
+
+QUEEN_BONUS = [
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 5, 5, 5, 0, -10],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [0, 0, 5, 5, 5, 5, 0, -5],
+    [-10, 5, 5, 5, 5, 5, 0, -10],
+    [-10, 0, 5, 0, 0, 0, 0, -10],
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+]
+
+KING_BONUS = [
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-20, -30, -30, -40, -40, -30, -30, -20],
+    [-10, -20, -20, -20, -20, -20, -20, -10],
+    [20, 20, 0, 0, 0, 0, 20, 20],
+    [20, 30, 10, 0, 0, 10, 30, 20],
+]
+
+# Development bonus for minor pieces
+DEVELOPMENT_BONUS = 10  # Points for developing minor pieces
+CENTER_CONTROL_BONUS = 15  # Points for controlling center squares
+
+
+# Position bonus table per piece type, in the order of the signed piece
+# codes on ChessBoard._codes: 1 (pawn) to 6 (king), negative for black
+CODE_BONUSES = (
+    ("Pawn", PAWN_BONUS),
+    ("Knight", KNIGHT_BONUS),
+    ("Bishop", BISHOP_BONUS),
+    ("Rook", ROOK_BONUS),
+    ("Queen", QUEEN_BONUS),
+    ("King", KING_BONUS),
+)
+
+# eval_board's value of every piece on every square as one table, indexed
+# by piece code + 6 and scored from white's side
+_CENTER = np.zeros((8, 8), dtype=np.int32)
+_CENTER[2:6, 2:6] = CENTER_CONTROL_BONUS
+EVAL_TABLE = np.zeros((13, 8, 8), dtype=np.int32)
+for _code, (_name, _bonus) in enumerate(CODE_BONUSES, start=1):
+    _white = PIECE_VALUES[_name] + np.array(_bonus, dtype=np.int32) + _CENTER
+    _black = _white.copy()
+    if _name in ("Knight", "Bishop"):
+        # Developed once off the back rank
+        _white[1:] += DEVELOPMENT_BONUS
+        _black[:7] += DEVELOPMENT_BONUS
+    EVAL_TABLE[6 + _code] = _white
+    EVAL_TABLE[6 - _code] = -_black
+_ROWS, _COLS = np.indices((8, 8))
+# EVAL_TABLE as nested lists keyed by (class name, colour), for scoring one
+# board of pieces without building a code grid
+SQUARE_VALUES = {}
+for _code, (_name, _) in enumerate(CODE_BONUSES, start=1):
+    SQUARE_VALUES[_name, "white"] = EVAL_TABLE[6 + _code].tolist()
+    SQUARE_VALUES[_name, "black"] = EVAL_TABLE[6 - _code].tolist()
+
+# Normalised scores are divided by this approximation of the largest score
+MAX_POSSIBLE_SCORE = 40000
+
 
 def eval_board(board, player_colour, score_normalised=False):
     """
@@ -15,148 +135,39 @@ def eval_board(board, player_colour, score_normalised=False):
             logger.warning("Invalid board structure in eval_board")
             return 0
 
-        # Piece values
-        piece_values = {
-            "Pawn": 100,
-            "Knight": 320,
-            "Bishop": 330,
-            "Rook": 500,
-            "Queen": 900,
-            "King": 20000,
-        }
-
-        # Position bonuses for each piece type
-        pawn_bonus = [
-            [0, 0, 0, 0, 0, 0, 0, 0],
-            [5, 10, 10, -20, -20, 10, 10, 5],
-            [5, -5, -10, 0, 0, -10, -5, 5],
-            [0, 0, 0, 20, 20, 0, 0, 0],
-            [5, 5, 10, 25, 25, 10, 5, 5],
-            [10, 10, 20, 30, 30, 20, 10, 10],
-            [50, 50, 50, 50, 50, 50, 50, 50],
-            [0, 0, 0, 0, 0, 0, 0, 0],
-        ]
-
-        knight_bonus = [
-            [-50, -40, -30, -30, -30, -30, -40, -50],
-            [-40, -20, 0, 0, 0, 0, -20, -40],
-            [-30, 0, 10, 15, 15, 10, 0, -30],
-            [-30, 5, 15, 20, 20, 15, 5, -30],
-            [-30, 0, 15, 20, 20, 15, 0, -30],
-            [-30, 5, 10, 15, 15, 10, 5, -30],
-            [-40, -20, 0, 5, 5, 0, -20, -40],
-            [-50, -40, -30, -30, -30, -30, -40, -50],
-        ]
-
-        bishop_bonus = [
-            [-20, -10, -10, -10, -10, -10, -10, -20],
-            [-10, 0, 0, 0, 0, 0, 0, -10],
-            [-10, 0, 5, 10, 10, 5, 0, -10],
-            [-10, 5, 5, 10, 10, 5, 5, -10],
-            [-10, 0, 10, 10, 10, 10, 0, -10],
-            [-10, 10, 10, 10, 10, 10, 10, -10],
-            [-10, 5, 0, 0, 0, 0, 5, -10],
-            [-20, -10, -10, -10, -10, -10, -10, -20],
-        ]
-
-        rook_bonus = [
-            [0, 0, 0, 0, 0, 0, 0, 0],
-            [5, 10, 10, 10, 10, 10, 10, 5],
-            [-5, 0, 0, 0, 0, 0, 0, -5],
-            [-5, 0, 0, 0, 0, 0, 0, -5],
-            [-5, 0, 0, 0, 0, 0, 0, -5],
-            [-5, 0, 0, 0, 0, 0, 0, -5],
-            [-5, 0, 0, 0, 0, 0, 0, -5],
-            [0, 0, 0, 5, 5, 0, 0, 0],
-        ]
-
-        queen_bonus = [
-            [-20, -10, -10, -5, -5, -10, -10, -20],
-            [-10, 0, 0, 0, 0, 0, 0, -10],
-            [-10, 0, 5, 5, 5, 5, 0, -10],
-            [-5, 0, 5, 5, 5, 5, 0, -5],
-            [0, 0, 5, 5, 5, 5, 0, -5],
-            [-10, 5, 5, 5, 5, 5, 0, -10],
-            [-10, 0, 5, 0, 0, 0, 0, -10],
-            [-20, -10, -10, -5, -5, -10, -10, -20],
-        ]
-
-        king_bonus = [
-            [-30, -40, -40, -50, -50, -40, -40, -30],
-            [-30, -40, -40, -50, -50, -40, -40, -30],
-            [-30, -40, -40, -50, -50, -40, -40, -30],
-            [-30, -40, -40, -50, -50, -40, -40, -30],
-            [-20, -30, -30, -40, -40, -30, -30, -20],
-            [-10, -20, -20, -20, -20, -20, -20, -10],
-            [20, 20, 0, 0, 0, 0, 20, 20],
-            [20, 30, 10, 0, 0, 10, 30, 20],
-        ]
-
-        # Development bonus for minor pieces
-        development_bonus = 10  # Points for developing minor pieces
-        center_control_bonus = 15  # Points for controlling center squares
-
-        white_score = 0
-        black_score = 0
-
-        # Count material and add position bonuses
-        for i in range(8):
-            for j in range(8):
-                piece = board[i][j]
+        # Each piece's value on its square, read from the shared table
+        score = 0
+        for i, row in enumerate(board):
+            for j, piece in enumerate(row):
                 if piece:
-                    piece_type = piece.__class__.__name__
-                    base_value = piece_values.get(piece_type, 0)
-                    position_bonus = 0
-
-                    # Position bonus based on piece type
-                    if piece_type == "Pawn":
-                        position_bonus = pawn_bonus[i][j]
-                    elif piece_type == "Knight":
-                        position_bonus = knight_bonus[i][j]
-                        # Development bonus for knights
-                        if piece.colour == "white" and i > 0:
-                            position_bonus += development_bonus
-                        elif piece.colour == "black" and i < 7:
-                            position_bonus += development_bonus
-                    elif piece_type == "Bishop":
-                        position_bonus = bishop_bonus[i][j]
-                        # Development bonus for bishops
-                        if piece.colour == "white" and i > 0:
-                            position_bonus += development_bonus
-                        elif piece.colour == "black" and i < 7:
-                            position_bonus += development_bonus
-                    elif piece_type == "Rook":
-                        position_bonus = rook_bonus[i][j]
-                    elif piece_type == "Queen":
-                        position_bonus = queen_bonus[i][j]
-                    elif piece_type == "King":
-                        position_bonus = king_bonus[i][j]
-
-                    # Center control bonus
-                    if 2 <= i <= 5 and 2 <= j <= 5:
-                        position_bonus += center_control_bonus
-
-                    # Add to appropriate score
-                    if piece.colour == "white":
-                        white_score += base_value + position_bonus
-                    else:
-                        black_score += base_value + position_bonus
-
-        # Calculate final score based on player perspective
-        score = (
-            white_score - black_score
-            if player_colour == "white"
-            else black_score - white_score
-        )
+                    values = SQUARE_VALUES.get((type(piece).__name__, piece.colour))
+                    if values is not None:
+                        score += values[i][j]
+        if player_colour != "white":
+            score = -score
 
         # Normalize if requested
         if score_normalised:
             # Normalize to range [-1, 1] based on maximum possible score
-            max_possible_score = 40000  # Approximation of maximum score
-            return score / max_possible_score
+            return score / MAX_POSSIBLE_SCORE
 
         return float(score)
 
     except Exception as e:
         logger.error(f"Error in eval_board: {e}")
         return 0  # Return neutral score when error occurs
+
+
+def eval_codes(codes, player_colour, score_normalised=False):
+    """
+    Score one or more signed piece-code grids (shape (8, 8) or (N, 8, 8))
+    the same way eval_board scores a board of pieces, in one numpy pass.
+    Returns an array with one score per grid
+    """
+    codes = np.asarray(codes)
+    scores = EVAL_TABLE[codes + 6, _ROWS, _COLS].sum(axis=(-2, -1))
+    if player_colour != "white":
+        scores = -scores
+    if score_normalised:
+        return scores / MAX_POSSIBLE_SCORE
+    return scores.astype(float)
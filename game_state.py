@@ -14,6 +14,28 @@ class GameState:
         """Create a deep copy of the game state"""
         return GameState(copy.deepcopy(self.board), self.player_turn)
 
+    def with_move(self, from_pos, to_pos):
+        """
+        Return the state after moving the piece on from_pos to to_pos, with
+        the turn passed on. Only the rows the move touches and the moved
+        piece are copied, the rest is shared with this state
+        """
+        from_x, from_y = from_pos
+        to_x, to_y = to_pos
+        board = self.board[:]
+        board[from_x] = board[from_x][:]
+        if to_x != from_x:
+            board[to_x] = board[to_x][:]
+
+        piece = copy.copy(board[from_x][from_y])
+        if hasattr(piece, "first_move"):
+            piece.first_move = False
+        board[to_x][to_y] = piece
+        board[from_x][from_y] = None
+
+        next_turn = "black" if self.player_turn == "white" else "white"
+        return GameState(board, next_turn)
+
     def __eq__(self, other):
         """Compare two game states for equality"""
         if not isinstance(other, GameState):
@@ -235,7 +235,7 @@ class ChessBoardUI(QMainWindow):
     def export(self):
         try:
             with sentry_sdk.start_span(op="gui.export", description="Export game"):
-                self.chess_board.board_array_to_pgn()
+                self.chess_board.board_array_to_pgn(save=True)
         except Exception as e:
             logger.error(f"Error exporting game: {e}")
             sentry_sdk.capture_exception(e)
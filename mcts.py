@@ -161,23 +161,8 @@ class Node:
                 if piece is None or piece.colour != state.player_turn:
                     return None
 
-                # Create a deep copy of the board
-                new_board = [[None for _ in range(8)] for _ in range(8)]
-                for i in range(8):
-                    for j in range(8):
-                        if board[i][j] is not None:
-                            new_piece = type(board[i][j])(board[i][j].colour)
-                            if hasattr(board[i][j], "first_move"):
-                                new_piece.first_move = board[i][j].first_move
-                            new_board[i][j] = new_piece
-
-                # Apply the move
-                new_board[to_pos[0]][to_pos[1]] = new_board[from_pos[0]][from_pos[1]]
-                new_board[from_pos[0]][from_pos[1]] = None
-                if hasattr(new_board[to_pos[0]][to_pos[1]], "first_move"):
-                    new_board[to_pos[0]][to_pos[1]].first_move = False
-
-                new_state.board = new_board
+                # Copies only the touched rows and hands the turn over
+                return new_state.with_move(from_pos, to_pos)
 
             # Update player turn
             new_state.player_turn = (
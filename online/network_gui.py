@@ -1,4 +1,4 @@
-import pickle
+import json
 from logging import getLogger
 from PyQt5.QtWidgets import (
     QLabel,
@@ -15,6 +15,35 @@ from online.networked_chess_board import NetworkedChessBoard
 
 logger = getLogger(__name__)
 
+
+def _square(part):
+    """(row, col) of a square sent as {"row": r, "col": c} or [r, c]"""
+    if isinstance(part, dict):
+        return part["row"], part["col"]
+    row, col = part
+    return row, col
+
+
+def decode_move(data):
+    """
+    Decode a move received from the network into move_piece arguments.
+    Moves are JSON, either [x, y, endx, endy] or the message sent by
+    ChessClient.send_move, {"move": {"from": {"row": r, "col": c}, "to": ...}}.
+    Raises ValueError for anything else
+    """
+    try:
+        move = json.loads(data)
+        if isinstance(move, dict):
+            move = move["move"]
+            move = (*_square(move["from"]), *_square(move["to"]))
+        move = tuple(move)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Malformed move frame: {data!r}") from e
+    if len(move) != 4 or not all(type(v) is int and 0 <= v < 8 for v in move):
+        raise ValueError(f"Malformed move frame: {data!r}")
+    return move
+
+
 # Try to import sentry_sdk, but don't fail if it's not available
 try:
     import sentry_sdk
@@ -226,7 +255,11 @@ class NetworkedChessBoardUI(ChessBoardUI):
                 data = self.chess_board.socket.recv(4096)
                 if not data:
                     break
-                move = pickle.loads(data)
+                try:
+                    move = decode_move(data)
+                except ValueError as e:
+                    logger.error(f"Rejected move: {e}")
+                    continue
                 self.chess_board.move_piece(*move)
                 self.update_ui()
             except Exception as e:
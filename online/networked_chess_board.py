@@ -1,6 +1,7 @@
 import asyncio
 import logging
 from chess_board_1 import ChessBoard
+from pieces import clone_board
 
 
 class NetworkedChessBoard(ChessBoard):
@@ -20,23 +21,16 @@ class NetworkedChessBoard(ChessBoard):
     def clone(self):
         """Create a deep copy of the board for AI search"""
         new_board = NetworkedChessBoard(is_server=self.is_server)
-        new_board.board = [[None for _ in range(8)] for _ in range(8)]
-
-        # Deep copy each piece
-        for i in range(8):
-            for j in range(8):
-                piece = self.board[i][j]
-                if piece:
-                    piece_type = type(piece)
-                    new_piece = piece_type(piece.colour)
-                    # Copy important piece attributes
-                    if hasattr(piece, "first_move"):
-                        new_piece.first_move = piece.first_move
-                    new_board.board[i][j] = new_piece
+        new_board.board = clone_board(self.board)
 
         new_board.player_turn = self.player_turn
         new_board.move_count = self.move_count
         new_board.material = self.material  # Copy material score
+        new_board.king_moved = dict(self.king_moved)
+        new_board.rook_moved = {
+            colour: dict(sides) for colour, sides in self.rook_moved.items()
+        }
+        new_board._rebuild_state()
         return new_board
 
     def get_valid_moves(self, x, y):
@@ -36,3 +36,19 @@ try:
 except ImportError:
     PSYCOPG2_AVAILABLE = False
     psycopg2 = OptionalDependencyWarning("psycopg2")
+
+
+# Numba
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    OptionalDependencyWarning("numba")
+
+    def njit(*args, **kwargs):
+        """Leave the function as plain Python when Numba is missing"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
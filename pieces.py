@@ -1,19 +1,95 @@
+import copy
+
+
+def clone_board(board):
+    """Copy a board so each piece, and its first_move flag, belongs to the copy"""
+    return [
+        [None if piece is None else copy.copy(piece) for piece in row] for row in board
+    ]
+
+
+def _path_clear(board, x, y, endx, endy):
+    """True if every square strictly between two aligned squares is empty"""
+    dx = (endx > x) - (endx < x)
+    dy = (endy > y) - (endy < y)
+    x, y = x + dx, y + dy
+    while (x, y) != (endx, endy):
+        if board[x][y] is not None:
+            return False
+        x, y = x + dx, y + dy
+    return True
+
+
+def _jump_table(steps):
+    """On-board targets of each step from every square, indexed [x][y]"""
+    return [
+        [
+            tuple(
+                (x + dx, y + dy)
+                for dx, dy in steps
+                if 0 <= x + dx < 8 and 0 <= y + dy < 8
+            )
+            for y in range(8)
+        ]
+        for x in range(8)
+    ]
+
+
+# Knight and king targets only depend on the square, so work them out once
+KNIGHT_MOVES = _jump_table(
+    ((1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1))
+)
+KING_MOVES = _jump_table(
+    ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1))
+)
+# Diagonal pawn captures by colour, white pawns move towards higher x
+PAWN_CAPTURES = {
+    "white": _jump_table(((1, -1), (1, 1))),
+    "black": _jump_table(((-1, -1), (-1, 1))),
+}
+
+
 # define the default parent piece class
 class Piece:
+    # Instances of shared types are interned in SHARED_PIECES and sit on many
+    # squares and boards at once, so they must not carry per-square state.
+    # The board UI tracks the selected square itself
+    shared = False
+    selected = False
+
     def __init__(self, colour):
         self.colour = colour
-        self.x = int
-        self.y = int
-        self.selected = False
 
     def select(self):
+        self._check_unshared("select")
         self.selected = True
 
     def deselect(self):
+        self._check_unshared("deselect")
         self.selected = False
 
+    def _check_unshared(self, action):
+        if self.shared:
+            raise TypeError(
+                f"Cannot {action} a shared {type(self).__name__}, "
+                "track the selected square on the board instead"
+            )
+
+    def can_attack(self, board, x, y, endx, endy):
+        """True if (endx, endy) is one of get_valid_moves(board, x, y)"""
+        return (endx, endy) in self.get_valid_moves(board, x, y)
+
+    def _can_land(self, board, endx, endy):
+        """True if the square is on the board and not held by our own piece"""
+        if not (0 <= endx < 8 and 0 <= endy < 8):
+            return False
+        target = board[endx][endy]
+        return target is None or target.colour != self.colour
+
 
 class Rook(Piece):
+    short = "Ro"
+
     def __init__(self, colour):
         super().__init__(colour)
         self.first_move = True
@@ -110,8 +186,18 @@ class Rook(Piece):
         """
         return valid_moves
 
+    def can_attack(self, board, x, y, endx, endy):
+        if (x == endx) == (y == endy):
+            return False
+        return self._can_land(board, endx, endy) and _path_clear(
+            board, x, y, endx, endy
+        )
+
 
 class Knight(Piece):
+    shared = True
+    short = "Kn"
+
     def __init__(self, colour):
         super().__init__(colour)
         self.weight = 3
@@ -121,18 +207,24 @@ class Knight(Piece):
             self.symbol = "n"
 
     def get_valid_moves(self, board, x, y):
-        valid_moves = []
-        # calculate all L shaped moves
-        moves = [(1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1)]
-        for dx, dy in moves:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < 8 and 0 <= ny < 8:
-                if board[nx][ny] is None or board[nx][ny].colour != self.colour:
-                    valid_moves.append((nx, ny))
-        return valid_moves
+        # all L shaped moves that stay on the board
+        colour = self.colour
+        return [
+            (nx, ny)
+            for nx, ny in KNIGHT_MOVES[x][y]
+            if board[nx][ny] is None or board[nx][ny].colour != colour
+        ]
+
+    def can_attack(self, board, x, y, endx, endy):
+        if {abs(endx - x), abs(endy - y)} != {1, 2}:
+            return False
+        return self._can_land(board, endx, endy)
 
 
 class Bishop(Piece):
+    shared = True
+    short = "Bi"
+
     def __init__(self, colour):
         super().__init__(colour)
         self.weight = 3
@@ -212,8 +304,18 @@ class Bishop(Piece):
 
         return valid_moves
 
+    def can_attack(self, board, x, y, endx, endy):
+        if abs(endx - x) != abs(endy - y) or x == endx:
+            return False
+        return self._can_land(board, endx, endy) and _path_clear(
+            board, x, y, endx, endy
+        )
+
 
 class Queen(Piece):
+    shared = True
+    short = "Qu"
+
     def __init__(self, colour):
         super().__init__(colour)
         self.weight = 9
@@ -255,8 +357,18 @@ class Queen(Piece):
 
         return valid_moves
 
+    def can_attack(self, board, x, y, endx, endy):
+        dx, dy = abs(endx - x), abs(endy - y)
+        if (dx, dy) == (0, 0) or (dx and dy and dx != dy):
+            return False
+        return self._can_land(board, endx, endy) and _path_clear(
+            board, x, y, endx, endy
+        )
+
 
 class King(Piece):
+    short = "Ki"
+
     def __init__(self, colour):
         super().__init__(colour)
         self.first_move = True
@@ -267,33 +379,26 @@ class King(Piece):
             self.symbol = "k"
 
     def get_valid_moves(self, board, x, y):
-        valid_moves = []
-
         # Check boundaries first
         if not (0 <= x < 8 and 0 <= y < 8):
-            return valid_moves
+            return []
 
-        directions = [
-            (0, 1),
-            (0, -1),
-            (1, 0),
-            (-1, 0),
-            (1, 1),
-            (1, -1),
-            (-1, 1),
-            (-1, -1),
+        colour = self.colour
+        return [
+            (nx, ny)
+            for nx, ny in KING_MOVES[x][y]
+            if board[nx][ny] is None or board[nx][ny].colour != colour
         ]
 
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < 8 and 0 <= ny < 8:  # Stay within board boundaries
-                if board[nx][ny] is None or board[nx][ny].colour != self.colour:
-                    valid_moves.append((nx, ny))
-
-        return valid_moves
+    def can_attack(self, board, x, y, endx, endy):
+        if max(abs(endx - x), abs(endy - y)) != 1:
+            return False
+        return self._can_land(board, endx, endy)
 
 
 class Pawn(Piece):
+    short = "Pa"
+
     def __init__(self, colour):
         super().__init__(colour)
         self.first_move = True
@@ -320,20 +425,39 @@ class Pawn(Piece):
                     if board[x + 2 * direction][y] is None:
                         valid_moves.append((x + 2 * direction, y))
 
-        # Check diagonal captures - left side
-        if 0 <= x + direction < 8 and 0 <= y - 1 < 8:
-            if (
-                board[x + direction][y - 1] is not None
-                and board[x + direction][y - 1].colour != self.colour
-            ):
-                valid_moves.append((x + direction, y - 1))
-
-        # Check diagonal captures - right side
-        if 0 <= x + direction < 8 and 0 <= y + 1 < 8:
-            if (
-                board[x + direction][y + 1] is not None
-                and board[x + direction][y + 1].colour != self.colour
-            ):
-                valid_moves.append((x + direction, y + 1))
+        # Diagonal captures, left side first
+        colour = self.colour
+        for nx, ny in PAWN_CAPTURES[colour][x][y]:
+            target = board[nx][ny]
+            if target is not None and target.colour != colour:
+                valid_moves.append((nx, ny))
 
         return valid_moves
+
+    def can_attack(self, board, x, y, endx, endy):
+        direction = 1 if self.colour == "white" else -1
+        if not (0 <= endx < 8 and 0 <= endy < 8):
+            return False
+        target = board[endx][endy]
+        # Diagonal captures
+        if endx == x + direction and abs(endy - y) == 1:
+            return target is not None and target.colour != self.colour
+        if endy != y or target is not None:
+            return False
+        # Forward moves, two squares only on the first move
+        if endx == x + direction:
+            return True
+        return (
+            self.first_move
+            and endx == x + 2 * direction
+            and board[x + direction][y] is None
+        )
+
+
+# Knights, bishops and queens carry no per-piece state, so boards share one
+# instance per type and colour. Pawns, rooks and kings track first_move
+SHARED_PIECES = {
+    (piece_type, colour): piece_type(colour)
+    for piece_type in (Knight, Bishop, Queen)
+    for colour in ("white", "black")
+}
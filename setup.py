@@ -0,0 +1,27 @@
+"""
+Optional native build of the engine's hot modules.
+
+Compiles chess_board_1.py and pieces.py in place with Cython so the
+extension modules are imported instead of the .py files. The .py files are
+left untouched and are used whenever the extensions have not been built.
+
+    pip install cython
+    python setup.py build_ext --inplace
+"""
+
+import sys
+
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    sys.exit("Cython is required to build the extensions: pip install cython")
+
+setup(
+    name="chess-engine-ext",
+    ext_modules=cythonize(
+        ["pieces.py", "chess_board_1.py"],
+        compiler_directives={"language_level": 3, "binding": True},
+    ),
+)
@@ -1,4 +1,8 @@
 import unittest
+import os
+import tempfile
+from unittest import mock
+import chess_board_1
 from chess_board_1 import ChessBoard
 from pieces import Bishop, King, Knight, Pawn, Queen, Rook
 
@@ -42,6 +46,60 @@ class TestChessBoard(unittest.TestCase):
         self.assertIsInstance(opening_name, str)
         self.assertEqual(opening_name, "Unknown Opening")
 
+    def test_get_opening_longest_prefix(self):
+        # Black answers each move itself: 1. e4 e5 2. Nf3 d5
+        self.chess_board.move_piece(1, 3, 3, 3)  # e4
+        self.assertEqual(self.chess_board.get_opening(), "King's Pawn Game")
+        self.chess_board.move_piece(0, 1, 2, 2)  # Nf3
+        self.assertEqual(self.chess_board._book_line(), "1. e4 e5 2. Nf3 d5")
+        self.assertEqual(self.chess_board.get_opening(), "Elephant Gambit")
+
+    def test_get_opening_cached_per_move(self):
+        self.chess_board.move_piece(1, 3, 3, 3)  # e4
+        with mock.patch.object(
+            self.chess_board, "_book_line", wraps=self.chess_board._book_line
+        ) as book_line:
+            first = self.chess_board.get_opening()
+            self.assertEqual(self.chess_board.get_opening(), first)
+            self.assertEqual(book_line.call_count, 1)
+            self.chess_board.move_piece(0, 1, 2, 2)  # Nf3
+            self.assertNotEqual(self.chess_board.get_opening(), first)
+            self.assertEqual(book_line.call_count, 2)
+
+    def test_get_opening_matches_whole_moves(self):
+        openings = {
+            b"1. e4": b"King's Pawn Game",
+            b"1. e4 e5 2. Nf3 d5 3. Bb5": b"Short",
+        }
+        with mock.patch.multiple(
+            self.chess_board, openings=openings, _opening_keys=sorted(openings)
+        ):
+            self.chess_board.move_piece(1, 3, 3, 3)  # e4
+            self.chess_board.move_piece(0, 1, 2, 2)  # Nf3
+            self.chess_board.move_piece(0, 2, 4, 6)  # Bb5+
+            self.assertIn("3. Bb5+", self.chess_board._book_line())
+            self.assertEqual(self.chess_board.get_opening(), "King's Pawn Game")
+
+    def test_get_opening_unknown_after_rebuild(self):
+        self.chess_board.move_piece(1, 3, 3, 3)  # e4
+        self.chess_board._rebuild_state()
+        self.chess_board.move_count += 1
+        self.assertEqual(self.chess_board.get_opening(), "Unknown Opening")
+
+    @mock.patch("chess_board_1._HOT_PATH_TRACE", False)
+    def test_hot_span_is_shared_noop_when_tracing_off(self):
+        self.assertIs(chess_board_1._hot_span("x", "y"), chess_board_1._NULL_SPAN)
+
+    def test_hot_span_formats_description_when_tracing(self):
+        trace = mock.patch.object(chess_board_1, "_HOT_PATH_TRACE", True)
+        with trace, mock.patch.object(chess_board_1.sentry_sdk, "start_span") as span:
+            chess_board_1._hot_span("chess.x", "Check %s", "white")
+        span.assert_called_once_with(op="chess.x", description="Check white")
+        self.assertIs(chess_board_1._hot_operation("x"), chess_board_1._NULL_SPAN)
+
+    def test_openings_shared_between_boards(self):
+        self.assertIs(self.chess_board.openings, ChessBoard().openings)
+
     def test_get_all_valid_moves(self):
         valid_moves = self.chess_board.get_all_valid_moves()
         self.assertGreater(len(valid_moves), 0)
@@ -51,16 +109,172 @@ class TestChessBoard(unittest.TestCase):
         self.assertIsInstance(fen, str)
         self.assertGreater(len(fen), 0)
 
+    def test_fen_follows_moves(self):
+        self.assertTrue(self.chess_board.move_piece(1, 0, 2, 0))
+        fen = self.chess_board.board_array_to_fen()
+        placement = self.chess_board._build_shadow().board_fen()
+        self.assertEqual(fen.split()[0], placement)
+
+    def test_fen_cache_invalidated_by_direct_edit(self):
+        self.assertEqual(
+            self.chess_board.board_array_to_fen(), self.chess_board._shadow.fen()
+        )
+        self.chess_board.board[1][0] = None
+        self.chess_board._rebuild_state()
+        self.assertTrue(
+            self.chess_board.board_array_to_fen().startswith("RNBKQBNR/1PPPPPPP/")
+        )
+
+    def test_board_array_to_pgn(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                file_name = self.chess_board.board_array_to_pgn(save=True)
+                self.assertIsNotNone(file_name)
+                with open(file_name) as pgn_file:
+                    contents = pgn_file.read()
+            finally:
+                os.chdir(cwd)
+        self.assertIn(self.chess_board.board_array_to_fen(), contents)
+
+    def test_board_array_to_pgn_without_saving(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                pgn_string = self.chess_board.board_array_to_pgn()
+                self.assertEqual(os.listdir(tmp), [])
+            finally:
+                os.chdir(cwd)
+        self.assertIn(self.chess_board.board_array_to_fen(), pgn_string)
+        self.assertIs(self.chess_board.board_array_to_pgn(), pgn_string)
+
     def test_get_material_count(self):
         white_material = self.chess_board.get_material_count("white")
         black_material = self.chess_board.get_material_count("black")
         self.assertIsInstance(white_material, int)
         self.assertIsInstance(black_material, int)
+        self.assertEqual(white_material, 0)
+
+    def test_material_count_after_capture(self):
+        self.chess_board._set_square(6, 0, None)
+        self.assertEqual(self.chess_board.get_material_count("white"), 1)
+        self.assertEqual(self.chess_board.get_material_count("black"), -1)
+        self.chess_board._rebuild_state()
+        self.assertEqual(self.chess_board.get_material_count("white"), 1)
 
     def test_move_piece(self):
         self.assertTrue(self.chess_board.move_piece(1, 0, 2, 0))  # Move white pawn
         self.assertFalse(self.chess_board.move_piece(1, 0, 3, 0))  # Invalid move
 
+    def test_move_into_check_rejected(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[0][3] = King("white")
+        self.chess_board.board[1][3] = Rook("white")
+        self.chess_board.board[5][3] = Rook("black")
+        self.chess_board.board[7][7] = King("black")
+        self.chess_board._rebuild_state()
+        before = [row[:] for row in self.chess_board.board]
+        self.assertFalse(self.chess_board.move_piece(1, 3, 1, 0))
+        self.assertEqual(self.chess_board.board, before)
+
+    def test_check_position(self):
+        board = [[None for _ in range(8)] for _ in range(8)]
+        board[0][3] = King("white")
+        board[2][4] = Knight("black")
+        self.assertEqual(self.chess_board.check_position(board, "white"), 1)
+        board[2][4] = None
+        board[5][3] = Rook("black")
+        board[3][3] = Pawn("white")
+        self.assertEqual(self.chess_board.check_position(board, "white"), 0)
+        board[3][3] = None
+        self.assertEqual(
+            self.chess_board.check_position(board, "white", king_position=(0, 3)), 1
+        )
+
+    def test_king_move_into_check_rejected(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[0][3] = King("white")
+        self.chess_board.board[5][4] = Rook("black")
+        self.chess_board.board[7][7] = King("black")
+        self.chess_board._rebuild_state()
+        self.assertFalse(self.chess_board.move_piece(0, 3, 0, 4))
+        self.assertTrue(self.chess_board.move_piece(0, 3, 0, 2))
+        self.assertEqual(self.chess_board.get_king_position("white"), (0, 2))
+
+    def test_move_promotes_pawn(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[0][3] = King("white")
+        self.chess_board.board[6][0] = Pawn("white")
+        self.chess_board.board[4][7] = King("black")
+        self.chess_board._rebuild_state()
+        self.assertTrue(self.chess_board.move_piece(6, 0, 7, 0))
+        self.assertIsInstance(self.chess_board.board[7][0], Queen)
+        self.assertIsNone(self.chess_board.board[6][0])
+        self.assertEqual(self.chess_board.get_material_count("white"), 9)
+
+    def test_evaluate_move_leaves_board_untouched(self):
+        before = [row[:] for row in self.chess_board.board]
+        score = self.chess_board.evaluate_move(
+            self.chess_board.board, (1, 4, 3, 4), "white"
+        )
+        self.assertIsInstance(score, (int, float))
+        self.assertEqual(self.chess_board.board, before)
+
+    def test_is_endgame_counts_match_board_scan(self):
+        board = [row[:] for row in self.chess_board.board]
+        self.assertEqual(
+            self.chess_board.is_endgame(self.chess_board.board),
+            self.chess_board.is_endgame(board),
+        )
+        self.chess_board._set_square(0, 4, None)
+        self.chess_board._set_square(7, 4, None)
+        self.assertTrue(self.chess_board.is_endgame(self.chess_board.board))
+        # Taking the last queen also reaches the endgame
+        self.chess_board._set_square(7, 4, Queen("black"))
+        self.assertFalse(self.chess_board.is_endgame(self.chess_board.board))
+        self.assertTrue(
+            self.chess_board.is_endgame(
+                self.chess_board.board, self.chess_board.board[7][4]
+            )
+        )
+
+    def test_evaluate_move_matches_copied_board(self):
+        self.assertTrue(self.chess_board.move_piece(1, 4, 3, 4))
+        board = [row[:] for row in self.chess_board.board]
+        for move in ((6, 3, 4, 3), (7, 1, 5, 2), (7, 4, 3, 0)):
+            self.assertEqual(
+                self.chess_board.evaluate_move(self.chess_board.board, move, "black"),
+                self.chess_board.evaluate_move(board, move, "black"),
+            )
+
+    def test_evaluate_codes_matches_python_path(self):
+        self.assertTrue(self.chess_board.move_piece(1, 4, 3, 4))
+        self.chess_board._set_square(4, 1, Knight("white"))
+        self.chess_board._set_square(3, 0, Pawn("white"))
+        self.chess_board._set_square(1, 0, None)
+        board = [row[:] for row in self.chess_board.board]
+        for colour in ("white", "black"):
+            with mock.patch.object(chess_board_1, "NUMBA_AVAILABLE", False):
+                expected = self.chess_board.evaluate_position(board, colour)
+            with mock.patch.object(chess_board_1, "NUMBA_AVAILABLE", True):
+                self.assertEqual(
+                    self.chess_board.evaluate_position(board, colour), expected
+                )
+
+    def test_pseudo_legal_moves_compiled_matches_python(self):
+        self.chess_board._set_square(3, 4, self.chess_board.board[1][4])
+        self.chess_board._set_square(1, 4, None)
+        self.chess_board._set_square(4, 3, self.chess_board.board[6][3])
+        self.chess_board._set_square(6, 3, None)
+        self.chess_board.board[4][3].first_move = False
+        for colour in ("white", "black"):
+            with mock.patch.object(chess_board_1, "NUMBA_AVAILABLE", False):
+                expected = self.chess_board.pseudo_legal_moves(colour)
+            with mock.patch.object(chess_board_1, "NUMBA_AVAILABLE", True):
+                self.assertEqual(self.chess_board.pseudo_legal_moves(colour), expected)
+
     def test_enpesaunt(self):
         self.chess_board.move_piece(1, 4, 3, 4)  # Move white pawn
         self.chess_board.move_piece(6, 3, 4, 3)  # Move black pawn
@@ -72,9 +286,63 @@ class TestChessBoard(unittest.TestCase):
         self.chess_board.board[0][3] = King("white")
         self.chess_board.board[0][0] = Rook("white")
         self.chess_board.board[0][4] = None
+        self.chess_board._rebuild_state()
+        self.assertEqual(
+            self.chess_board.castling(self.chess_board.board, "white"), "queenside"
+        )
+
+    def test_move_piece_castles_queenside(self):
+        self.chess_board.board[0][1] = None
+        self.chess_board.board[0][2] = None
+        self.chess_board._rebuild_state()
+        self.assertTrue(self.chess_board.move_piece(0, 3, 0, 2))
+        self.assertIsInstance(self.chess_board.board[0][2], King)
+        self.assertIsInstance(self.chess_board.board[0][3], Rook)
+        self.assertIsNone(self.chess_board.board[0][0])
+        self.assertTrue(self.chess_board.king_moved["white"])
+
+    def test_move_piece_king_step_off_home_rank_is_not_castling(self):
+        for square in ((0, 1), (0, 2), (1, 2)):
+            self.chess_board.board[square[0]][square[1]] = None
+        self.chess_board._rebuild_state()
+        self.assertTrue(self.chess_board.move_piece(0, 3, 1, 2))
+        self.assertIsInstance(self.chess_board.board[1][2], King)
+        self.assertIsInstance(self.chess_board.board[0][0], Rook)
+        self.assertIsInstance(self.chess_board.board[1][0], Pawn)
+        self.assertIsInstance(self.chess_board.board[1][3], Pawn)
+        self.assertEqual(self.chess_board.board[1][3].colour, "white")
+
+    def test_move_piece_castling_only_frees_the_king(self):
+        self.chess_board.board[0][1] = None
+        self.chess_board.board[0][2] = None
+        self.chess_board._rebuild_state()
+        self.assertFalse(self.chess_board.move_piece(1, 5, 4, 1))
+        self.assertFalse(self.chess_board.move_piece(0, 3, 0, 1))
+        self.assertIsInstance(self.chess_board.board[1][5], Pawn)
+        self.assertIsNone(self.chess_board.board[4][1])
+
+    def test_castling_lost_after_king_moves(self):
+        self.assertFalse(self.chess_board.castling(self.chess_board.board, "white"))
+        self.chess_board._set_square(0, 1, None)
+        self.chess_board._set_square(0, 2, None)
         self.assertEqual(
             self.chess_board.castling(self.chess_board.board, "white"), "queenside"
         )
+        self.chess_board._set_square(0, 2, self.chess_board.board[0][3])
+        self.chess_board._set_square(0, 3, None)
+        self.assertFalse(self.chess_board.castling(self.chess_board.board, "white"))
+
+    def test_rebuild_state_clears_castling_rights_off_home(self):
+        board = self.chess_board.board
+        board[0][1] = board[0][2] = None
+        board[0][0] = None
+        board[7][7] = Knight("black")
+        self.chess_board._rebuild_state()
+        self.assertTrue(self.chess_board.rook_moved["white"]["q"])
+        self.assertTrue(self.chess_board.rook_moved["black"]["k"])
+        self.assertFalse(self.chess_board.rook_moved["white"]["k"])
+        self.assertFalse(self.chess_board.king_moved["white"])
+        self.assertFalse(self.chess_board.castling(board, "white"))
 
     def test_are_you_in_check(self):
         self.assertEqual(self.chess_board.are_you_in_check("white"), 0)
@@ -82,6 +350,16 @@ class TestChessBoard(unittest.TestCase):
         self.chess_board.board[6][4] = Queen("black")
         self.assertEqual(self.chess_board.are_you_in_check("white"), 0)
 
+    def test_checkmate_restores_board(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[0][0] = King("white")
+        self.chess_board.board[1][1] = Queen("black")
+        self.chess_board.board[2][2] = King("black")
+        self.chess_board._rebuild_state()
+        before = [row[:] for row in self.chess_board.board]
+        self.assertEqual(self.chess_board.are_you_in_check("white"), 2)
+        self.assertEqual(self.chess_board.board, before)
+
     def test_game_over(self):
         self.assertFalse(self.chess_board.game_over())
         self.chess_board.board[1][4] = None  # Clear path for checkmate
@@ -89,6 +367,158 @@ class TestChessBoard(unittest.TestCase):
         self.chess_board.board[6][5] = Queen("black")
         self.assertFalse(self.chess_board.game_over())
 
+    def test_bitboards_match_board(self):
+        for x in range(8):
+            for y in range(8):
+                piece = self.chess_board.board[x][y]
+                bit = 1 << ((x << 3) | y)
+                if piece is None:
+                    self.assertFalse(self.chess_board.occupied & bit)
+                else:
+                    key = (piece.colour, piece.symbol.upper())
+                    self.assertTrue(self.chess_board.bb[key] & bit)
+
+    def test_piece_codes_follow_moves(self):
+        self.assertTrue(self.chess_board.move_piece(1, 0, 2, 0))
+        codes = self.chess_board._codes.copy()
+        self.chess_board._rebuild_state()
+        self.assertTrue((self.chess_board._codes == codes).all())
+        self.assertEqual(codes[2][0], 1)
+        self.assertEqual(codes[1][0], 0)
+        self.assertEqual(codes[7][3], -6)
+        self.assertEqual(self.chess_board._material, {"white": 39, "black": 39})
+
+    def test_black_reply_keeps_state_in_sync(self):
+        self.assertTrue(self.chess_board.move_piece(1, 0, 2, 0))
+        self.assertEqual(self.chess_board.player_turn, "white")
+        self.assertEqual(self.chess_board.move_count, 2)
+        bb = dict(self.chess_board.bb)
+        pieces_by_colour = {
+            colour: set(squares)
+            for colour, squares in self.chess_board._pieces_by_colour.items()
+        }
+        self.chess_board._rebuild_state()
+        self.assertEqual(self.chess_board.bb, bb)
+        self.assertEqual(self.chess_board._pieces_by_colour, pieces_by_colour)
+
+    def test_bitboards_follow_moves(self):
+        self.chess_board.move_piece(1, 0, 2, 0)
+        self.assertFalse(self.chess_board.bb["white", "P"] & (1 << 8))
+        self.assertTrue(self.chess_board.bb["white", "P"] & (1 << 16))
+
+    def test_pieces_by_colour_follow_moves(self):
+        self.chess_board.move_piece(1, 0, 2, 0)
+        for colour in ("white", "black"):
+            expected = {
+                (x, y)
+                for x in range(8)
+                for y in range(8)
+                if self.chess_board.board[x][y] is not None
+                and self.chess_board.board[x][y].colour == colour
+            }
+            self.assertEqual(self.chess_board._pieces_by_colour[colour], expected)
+
+    def test_square_attacked_by(self):
+        board = self.chess_board.board
+        self.assertTrue(self.chess_board._square_attacked_by(board, 2, 0, "white"))
+        self.assertTrue(self.chess_board._square_attacked_by(board, 5, 7, "black"))
+        self.assertFalse(self.chess_board._square_attacked_by(board, 3, 3, "white"))
+        self.assertFalse(self.chess_board._square_attacked_by(board, 2, 0, "black"))
+        # Rooks are blocked by their own pawns
+        self.assertFalse(self.chess_board._square_attacked_by(board, 4, 0, "white"))
+
+    def test_square_attacked_codes_matches_board_walk(self):
+        self.assertTrue(self.chess_board.move_piece(1, 4, 3, 4))
+        board = [row[:] for row in self.chess_board.board]
+        for x in range(8):
+            for y in range(8):
+                for colour, sign in (("white", 1), ("black", -1)):
+                    self.assertEqual(
+                        chess_board_1._square_attacked_codes(
+                            self.chess_board._codes, x, y, sign
+                        ),
+                        self.chess_board._square_attacked_by(board, x, y, colour),
+                    )
+
+    def test_attackers_to_matches_board_walk(self):
+        self.assertTrue(self.chess_board.move_piece(1, 4, 3, 4))
+        board = [row[:] for row in self.chess_board.board]
+        for x in range(8):
+            for y in range(8):
+                for colour in ("white", "black"):
+                    self.assertEqual(
+                        bool(self.chess_board._attackers_to(x, y, colour)),
+                        self.chess_board._square_attacked_by(board, x, y, colour),
+                    )
+
+    def test_attackers_to_finds_each_checker(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[0][3] = King("white")
+        self.chess_board.board[5][3] = Rook("black")
+        self.chess_board.board[2][4] = Knight("black")
+        self.chess_board.board[7][7] = King("black")
+        self.chess_board._rebuild_state()
+        attackers = self.chess_board._attackers_to(0, 3, "black")
+        self.assertEqual(attackers, (1 << (5 << 3 | 3)) | (1 << (2 << 3 | 4)))
+        self.assertEqual(self.chess_board.are_you_in_check("white"), 1)
+
+    def test_double_check_ignores_captures(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[0][0] = King("white")
+        self.chess_board.board[1][0] = Pawn("white")
+        self.chess_board.board[1][1] = Pawn("white")
+        self.chess_board.board[2][4] = Rook("white")
+        self.chess_board.board[0][5] = Rook("black")
+        self.chess_board.board[2][1] = Knight("black")
+        self.chess_board.board[7][7] = King("black")
+        self.chess_board._rebuild_state()
+        # The rook can take the knight, but the other checker remains
+        self.assertTrue(self.chess_board.is_checkmate("white", (0, 0)))
+
+    def test_king_cannot_retreat_along_checking_ray(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[1][3] = King("white")
+        self.chess_board.board[7][2] = Rook("black")
+        self.chess_board.board[7][3] = Rook("black")
+        self.chess_board.board[7][4] = Rook("black")
+        self.chess_board.board[5][7] = King("black")
+        self.chess_board._rebuild_state()
+        # (0, 3) is only attacked once the king has stepped off (1, 3)
+        self.assertEqual(self.chess_board.are_you_in_check("white"), 2)
+
+    def test_leaves_king_safe_rejects_pinned_piece(self):
+        self.chess_board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.chess_board.board[0][3] = King("white")
+        self.chess_board.board[2][3] = Bishop("white")
+        self.chess_board.board[6][3] = Rook("black")
+        self.chess_board.board[7][7] = King("black")
+        self.chess_board._rebuild_state()
+        before = [row[:] for row in self.chess_board.board]
+        self.assertFalse(self.chess_board.leaves_king_safe(2, 3, 3, 4))
+        self.assertTrue(self.chess_board.leaves_king_safe(0, 3, 0, 2))
+        self.assertEqual(self.chess_board.board, before)
+
+    def test_zobrist_matches_transposed_position(self):
+        other = ChessBoard()
+        board = self.chess_board
+        knight, pawn = board.board[0][1], board.board[1][4]
+        # The same two moves, played in opposite orders
+        board._set_square(2, 2, knight)
+        board._set_square(0, 1, None)
+        board._set_square(3, 4, pawn)
+        board._set_square(1, 4, None)
+        other._set_square(3, 4, other.board[1][4])
+        other._set_square(1, 4, None)
+        other._set_square(2, 2, other.board[0][1])
+        other._set_square(0, 1, None)
+        self.assertEqual(board.zobrist, other.zobrist)
+        self.assertNotEqual(board.zobrist, chess_board_1.INITIAL_ZOBRIST)
+        self.assertEqual(board.zobrist, chess_board_1.zobrist_hash(board.bb))
+
+    def test_get_king_position(self):
+        self.assertEqual(self.chess_board.get_king_position("white"), (0, 3))
+        self.assertEqual(self.chess_board.get_king_position("black"), (7, 3))
+
     def test_pawn_promotion(self):
         self.chess_board.board[6][0] = None
         self.chess_board.board[7][0] = Pawn("white")  # make white pawn
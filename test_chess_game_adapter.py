@@ -0,0 +1,69 @@
+import unittest
+
+from chess_board_1 import ChessBoard
+from chess_game_adapter import ChessGameAdapter
+from eval_board import eval_board
+from pieces import King, Queen, Rook
+
+
+def make_board(pieces):
+    """A ChessBoard holding only the given {(x, y): piece} squares"""
+    board = ChessBoard()
+    board.board = [[None for _ in range(8)] for _ in range(8)]
+    for (x, y), piece in pieces.items():
+        board.board[x][y] = piece
+    board._rebuild_state()
+    return board
+
+
+class TestGetRewardsBatch(unittest.TestCase):
+    def setUp(self):
+        self.start = ChessBoard()
+        self.adapter = ChessGameAdapter(self.start)
+        # White king mated on the back rank by two rooks
+        self.mated = make_board(
+            {
+                (0, 0): King("white"),
+                (0, 7): Rook("black"),
+                (1, 6): Rook("black"),
+                (7, 3): King("black"),
+            }
+        )
+        self.no_white_king = make_board({(7, 3): King("black")})
+        self.extra_queen = make_board(
+            {
+                (0, 3): King("white"),
+                (3, 3): Queen("white"),
+                (7, 3): King("black"),
+            }
+        )
+
+    def test_checkmate_is_a_loss_for_the_mated_side(self):
+        self.assertEqual(self.adapter.get_rewards_batch([self.mated], True), [-1.0])
+        self.assertEqual(self.adapter.get_rewards_batch([self.mated], False), [1.0])
+
+    def test_missing_king_scores_zero(self):
+        self.assertEqual(
+            self.adapter.get_rewards_batch([self.no_white_king], True), [0.0]
+        )
+
+    def test_other_positions_match_eval_board(self):
+        boards = [self.start, self.mated, self.extra_queen, self.no_white_king]
+        rewards = self.adapter.get_rewards_batch(boards, True)
+        self.assertAlmostEqual(rewards[0], eval_board(self.start.board, "white", True))
+        self.assertEqual(rewards[1], -1.0)
+        self.assertAlmostEqual(
+            rewards[2], eval_board(self.extra_queen.board, "white", True)
+        )
+        self.assertGreater(rewards[2], 0)
+        self.assertEqual(rewards[3], 0.0)
+
+    def test_get_reward_is_a_batch_of_one(self):
+        self.assertAlmostEqual(
+            self.adapter.get_reward(self.extra_queen, False),
+            -eval_board(self.extra_queen.board, "white", True),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
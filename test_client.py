@@ -1,11 +1,18 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
 import pytest
 from PyQt5.QtCore import QThread
-from client import WebSocketThread
+import client
+from client import ChessClient, WebSocketThread
+from online.network_gui import decode_move
 
 # Skip all async tests
-pytestmark = pytest.mark.skip(reason="Async tests were causing hanging")
+skip_async = pytest.mark.skip(reason="Async tests were causing hanging")
 
 
+@skip_async
 def test_websocket_thread_initialization():
     """Test basic initialization without any async operations"""
     thread = WebSocketThread("ws://localhost:8000/ws", username="test_user")
@@ -15,3 +22,68 @@ def test_websocket_thread_initialization():
     assert thread.username == "test_user"
     assert thread.websocket is None
     assert thread.running is True
+
+
+def test_decode_move_round_trips_send_move():
+    sent = []
+    client = SimpleNamespace(
+        username="test_user",
+        websocket_thread=SimpleNamespace(queue_move=sent.append),
+    )
+    ChessClient.send_move(client, {"row": 1, "col": 4}, {"row": 3, "col": 4})
+    assert decode_move(json.dumps(sent[0]).encode()) == (1, 4, 3, 4)
+
+
+def test_decode_move_accepts_plain_list():
+    assert decode_move(b"[6, 3, 4, 3]") == (6, 3, 4, 3)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"not json", b'{"type": "ack"}', b"[1, 2, 3]", b"[0, 0, 0, 8]", b'"e2e4"'],
+)
+def test_decode_move_rejects_malformed_frames(data):
+    with pytest.raises(ValueError, match="Malformed move frame"):
+        decode_move(data)
+
+
+class FakeWebSocket:
+    """Serves a fixed list of frames, then fails like a closed connection"""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def recv(self):
+        await asyncio.sleep(0)
+        if not self.frames:
+            raise ConnectionError("closed")
+        return self.frames.pop(0)
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def test_websocket_thread_sends_queued_moves_and_forwards_only_moves(monkeypatch):
+    move = {"type": "move", "move": {"from": {"row": 6, "col": 3}, "to": [4, 3]}}
+    websocket = FakeWebSocket(['{"type": "ack"}', json.dumps(move)])
+    monkeypatch.setattr(client.websockets, "connect", lambda url: websocket)
+    thread = WebSocketThread("ws://localhost:8000/ws", username="test_user")
+    received = []
+    thread.data_received.connect(received.append)
+
+    thread.queue_move({"type": "move", "move": {"from": [1, 4], "to": [3, 4]}})
+    thread.loop.run_until_complete(thread.connect_and_receive())
+    thread.loop.close()
+
+    assert [json.loads(message) for message in websocket.sent] == [
+        {"type": "move", "move": {"from": [1, 4], "to": [3, 4]}}
+    ]
+    assert received == [json.dumps(move).encode()]
+    assert thread.running is False
@@ -1,6 +1,9 @@
 import unittest
 
-from eval_board import eval_board
+import numpy as np
+
+from chess_board_1 import ChessBoard
+from eval_board import eval_board, eval_codes
 from pieces import Bishop, King, Knight, Pawn, Queen, Rook
 
 
@@ -91,6 +94,14 @@ class TestEvalBoard(unittest.TestCase):
         self.assertLess(score, 0)  # Score should be negative
         self.assertGreater(score, -0.02)  # But not too negative
 
+    def test_eval_codes_matches_eval_board(self):
+        chess_board = ChessBoard()
+        chess_board.move_piece(1, 4, 3, 4)
+        boards = [chess_board, ChessBoard()]
+        scores = eval_codes(np.stack([b._codes for b in boards]), "black", True)
+        for board, score in zip(boards, scores):
+            self.assertAlmostEqual(score, eval_board(board.board, "black", True))
+
     def default_board(self, board):
         board[0][0] = Rook("white")
         board[0][1] = Knight("white")
@@ -62,6 +62,18 @@ class TestMCTS(unittest.TestCase):
         )  # New position should have pawn
         self.assertEqual(new_state.board[2][0].colour, "white")  # Should be white pawn
 
+    def test_node_apply_move_leaves_parent_state(self):
+        node = Node(self.initial_board_array)
+        pawn = node.state.board[1][0]
+        new_state = node.apply_move(node.state, ((1, 0), (3, 0)))
+        self.assertIs(node.state.board[1][0], pawn)
+        self.assertTrue(pawn.first_move)
+        self.assertFalse(new_state.board[3][0].first_move)
+        self.assertEqual(node.state.player_turn, "white")
+        self.assertEqual(new_state.player_turn, "black")
+        # Rows the move did not touch are shared
+        self.assertIs(new_state.board[0], node.state.board[0])
+
     def test_node_backpropagate(self):
         node = Node(self.initial_board_array)
         child = Node(self.initial_board_array, parent=node)
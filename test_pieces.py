@@ -1,5 +1,15 @@
 import pytest
-from pieces import Piece, Rook, Knight, Bishop, Queen, King, Pawn
+from pieces import (
+    SHARED_PIECES,
+    Piece,
+    Rook,
+    Knight,
+    Bishop,
+    Queen,
+    King,
+    Pawn,
+    clone_board,
+)
 
 
 @pytest.fixture
@@ -16,6 +26,22 @@ def test_piece_selection():
     assert not piece.selected
 
 
+def test_short_names():
+    for piece_type in (Rook, Knight, Bishop, Queen, King, Pawn):
+        assert piece_type("white").short == piece_type.__name__[0:2]
+
+
+def test_shared_pieces():
+    for (piece_type, colour), piece in SHARED_PIECES.items():
+        assert type(piece) is piece_type
+        assert piece.colour == colour
+        assert not hasattr(piece, "first_move")
+        assert vars(piece).keys() == {"colour", "weight", "symbol"}
+        with pytest.raises(TypeError):
+            piece.select()
+        assert not piece.selected
+
+
 def test_rook_moves(empty_board):
     rook = Rook("white")
     empty_board[0][0] = rook
@@ -32,6 +58,19 @@ def test_knight_moves(empty_board):
     assert set(valid_moves) == set(expected_moves)
 
 
+@pytest.mark.parametrize("piece_type", [Knight, King])
+def test_jump_moves_stay_on_board(empty_board, piece_type):
+    piece = piece_type("white")
+    empty_board[0][0] = piece
+    empty_board[1][1] = Pawn("white")
+    empty_board[2][1] = Pawn("black")
+    valid_moves = set(piece.get_valid_moves(empty_board, 0, 0))
+    if piece_type is Knight:
+        assert valid_moves == {(1, 2), (2, 1)}
+    else:
+        assert valid_moves == {(0, 1), (1, 0)}
+
+
 def test_bishop_moves(empty_board):
     bishop = Bishop("white")
     empty_board[4][4] = bishop
@@ -97,3 +136,37 @@ def test_pawn_moves(empty_board):
     valid_moves = pawn.get_valid_moves(empty_board, 1, 1)
     expected_moves = [(2, 1)]
     assert set(valid_moves) == set(expected_moves)
+
+
+def test_pawn_captures_on_edge_file(empty_board):
+    pawn = Pawn("black")
+    empty_board[6][0] = pawn
+    empty_board[5][1] = Knight("white")
+    empty_board[5][0] = Pawn("white")
+    assert pawn.get_valid_moves(empty_board, 6, 0) == [(5, 1)]
+
+
+@pytest.mark.parametrize("piece_type", [Rook, Knight, Bishop, Queen, King, Pawn])
+def test_can_attack_matches_valid_moves(empty_board, piece_type):
+    piece = piece_type("white")
+    empty_board[3][3] = piece
+    empty_board[3][6] = Pawn("white")
+    empty_board[5][5] = Knight("black")
+    empty_board[4][2] = Bishop("black")
+    empty_board[1][3] = Rook("black")
+    valid_moves = set(piece.get_valid_moves(empty_board, 3, 3))
+    for x in range(8):
+        for y in range(8):
+            assert piece.can_attack(empty_board, 3, 3, x, y) == ((x, y) in valid_moves)
+
+
+def test_clone_board_copies_pieces(empty_board):
+    pawn = Pawn("white")
+    empty_board[1][1] = pawn
+    cloned = clone_board(empty_board)
+    assert cloned is not empty_board
+    assert cloned[1][1] is not pawn
+    assert isinstance(cloned[1][1], Pawn)
+    cloned[1][1].first_move = False
+    assert pawn.first_move
+    assert cloned[0][0] is None